@@ -0,0 +1,202 @@
+import asyncio
+import hmac
+import json
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+from metrics import registry
+
+ADMISSION_REJECTED = registry.counter(
+    "resumemate_admission_rejected_total",
+    "Запросы, отклоненные контролем допуска",
+    ("class", "reason")
+)
+ADMISSION_WAIT_SECONDS = registry.histogram(
+    "resumemate_admission_wait_seconds",
+    "Время ожидания свободного слота",
+    ("class",)
+)
+
+class Rejected(Exception):
+    """Запрос не допущен к обработке"""
+
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionClass:
+    """Лимиты одного класса эндпоинтов
+
+    Одновременно выполняется не больше concurrency запросов, еще не
+    больше queue_size ждут слот не дольше queue_timeout секунд. Один
+    клиент может держать не больше per_client запросов (выполняемых и
+    ожидающих) — остальным клиентам всегда остается место в очереди.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, per_client: int,
+                 queue_timeout: float = 5.0):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.per_client = per_client
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.clients: Dict[str, int] = {}
+        # Скользящее среднее длительности запроса для оценки Retry-After
+        self.service_time = 1.0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+        registry.gauge(
+            f"resumemate_admission_{name}_queue_depth",
+            f"Запросы класса {name}, ожидающие слот",
+            lambda: self.waiting
+        )
+        registry.gauge(
+            f"resumemate_admission_{name}_in_flight",
+            f"Выполняемые запросы класса {name}",
+            lambda: self.in_flight
+        )
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.service_time * (self.waiting + 1) / self.concurrency))
+
+    def _reject(self, status: int, reason: str):
+        ADMISSION_REJECTED.inc(self.name, reason)
+        raise Rejected(status, reason, self._retry_after())
+
+    async def acquire(self, client: str):
+        """Занять слот или выбросить Rejected"""
+        if self.clients.get(client, 0) >= self.per_client:
+            self._reject(429, "client_quota")
+        if self._semaphore.locked() and self.waiting >= self.queue_size:
+            self._reject(503, "queue_full")
+
+        self.clients[client] = self.clients.get(client, 0) + 1
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._release_client(client)
+            self._reject(503, "queue_timeout")
+        except BaseException:
+            self._release_client(client)
+            raise
+        finally:
+            self.waiting -= 1
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, self.name)
+        self.in_flight += 1
+
+    def release(self, client: str, duration: float):
+        self.in_flight -= 1
+        self._semaphore.release()
+        self._release_client(client)
+        self.service_time = 0.2 * duration + 0.8 * self.service_time
+
+    def _release_client(self, client: str):
+        remaining = self.clients[client] - 1
+        if remaining:
+            self.clients[client] = remaining
+        else:
+            del self.clients[client]
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "queue_size": self.queue_size,
+            "queue_depth": self.waiting,
+            "clients": len(self.clients),
+            "rejected": sum(
+                count for (name, _), count in ADMISSION_REJECTED.values.items() if name == self.name
+            )
+        }
+
+class AdmissionController:
+    """Классы эндпоинтов и соответствие путей классам"""
+
+    def __init__(self):
+        self.classes: Dict[str, AdmissionClass] = {}
+        self.routes: Dict[Tuple[str, str], AdmissionClass] = {}
+
+    def add_class(self, admission_class: AdmissionClass, *routes: Tuple[str, str]) -> AdmissionClass:
+        self.classes[admission_class.name] = admission_class
+        for method, path in routes:
+            self.routes[(method, path)] = admission_class
+        return admission_class
+
+    def match(self, method: str, path: str) -> Optional[AdmissionClass]:
+        return self.routes.get((method, path))
+
+    def stats(self) -> Dict:
+        return {name: admission_class.stats() for name, admission_class in self.classes.items()}
+
+def client_id(scope, token: Optional[str] = None) -> str:
+    """Ключ клиента для квот
+
+    X-Client-Id учитывается, только если вызывающий предъявил токен
+    доверенного клиента (X-Client-Token, например бот, который передает
+    id пользователя Telegram). Иначе любой мог бы обходить квоты, меняя
+    заголовок, поэтому остальные клиенты различаются по IP.
+    """
+    headers = dict(scope["headers"])
+    presented = headers.get(b"x-client-token")
+    requested = headers.get(b"x-client-id")
+    if token and presented and requested and hmac.compare_digest(presented, token.encode()):
+        return "id:" + requested.decode("latin-1")[:64]
+    client = scope.get("client")
+    return "ip:" + client[0] if client else "unknown"
+
+class AdmissionMiddleware:
+    """ASGI middleware, ограничивающее параллельность по классам эндпоинтов
+
+    Клиент определяется по IP или, для доверенных клиентов с client_token,
+    по заголовку X-Client-Id. Сверх лимитов запрос сразу получает 429
+    (квота клиента) или 503 (очередь переполнена либо слот не освободился
+    вовремя) с Retry-After.
+    """
+
+    def __init__(self, app, controller: AdmissionController, client_token: Optional[str] = None):
+        self.app = app
+        self.controller = controller
+        self.client_token = client_token
+
+    async def __call__(self, scope, receive, send):
+        admission_class = None
+        if scope["type"] == "http":
+            admission_class = self.controller.match(scope["method"], scope["path"])
+        if admission_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = client_id(scope, self.client_token)
+        try:
+            await admission_class.acquire(client)
+        except Rejected as e:
+            await self._send_rejection(send, e)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_class.release(client, time.perf_counter() - started)
+
+    @staticmethod
+    async def _send_rejection(send, rejection: Rejected):
+        body = json.dumps({"detail": rejection.reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": rejection.status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(rejection.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
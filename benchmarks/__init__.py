@@ -0,0 +1,5 @@
+"""
+Бенчмарки и нагрузочные стенды ResumeMate
+
+Запуск: python -m benchmarks.<модуль>
+"""
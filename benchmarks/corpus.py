@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетических резюме в форматах PDF и DOCX
+
+Управляемые параметры: размер текста, доля русского текста и плотность
+навыков. PDF собирается вручную, без сторонних библиотек, с картой
+ToUnicode, поэтому кириллица извлекается через PyPDF2 так же, как из
+настоящих резюме.
+
+Пример:
+    python -m benchmarks.corpus ./corpus --count 100 --size 3000 --ru-share 0.7
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import Dict, List, Tuple
+
+SKILLS = [
+    'python', 'javascript', 'java', 'c++', 'php', 'go', 'kotlin', 'typescript', 'react', 'vue',
+    'node.js', 'django', 'flask', 'spring', 'html', 'css', 'sql', 'postgresql', 'mongodb', 'redis',
+    'docker', 'kubernetes', 'aws', 'git', 'linux', 'nginx', 'terraform', 'pandas', 'numpy',
+    'tensorflow', 'pytorch', 'excel', 'power bi', 'android', 'ios', 'flutter', 'selenium', 'pytest',
+    'figma', 'photoshop', 'seo', 'crm', 'agile', 'scrum', 'jira', 'confluence'
+]
+
+RU_SENTENCES = [
+    "Разрабатывал и поддерживал сервисы для обработки заказов",
+    "Участвовал в проектировании архитектуры и код-ревью",
+    "Оптимизировал запросы к базе данных и сократил время ответа",
+    "Наставник для младших разработчиков в команде",
+    "Внедрил автоматическое тестирование и непрерывную интеграцию",
+    "Взаимодействовал с заказчиками и аналитиками по требованиям",
+    "Готовил техническую документацию и отчеты",
+]
+
+EN_SENTENCES = [
+    "Designed and maintained backend services for order processing",
+    "Took part in architecture design and code reviews",
+    "Optimized database queries and reduced response time",
+    "Mentored junior developers in the team",
+    "Introduced automated testing and continuous integration",
+    "Worked with clients and analysts on requirements",
+    "Prepared technical documentation and reports",
+]
+
+# Словарь для пословной генерации: слова шаблонных предложений и слоги
+# для названий компаний, проектов и фамилий
+_WORDS = {
+    russian: sorted({word.lower() for sentence in sentences for word in sentence.split()})
+    for russian, sentences in ((True, RU_SENTENCES), (False, EN_SENTENCES))
+}
+_SYLLABLES = {
+    True: ["ка", "ро", "ми", "тех", "сер", "вис", "ан", "ли", "ва", "гор", "ин", "ком", "дар", "ло"],
+    False: ["ka", "ro", "mi", "tek", "ser", "vis", "an", "li", "va", "gor", "in", "kom", "dar", "lo"],
+}
+
+def _random_name(rng: random.Random, russian: bool) -> str:
+    return "".join(rng.choice(_SYLLABLES[russian]) for _ in range(rng.randint(2, 4))).capitalize()
+
+def _random_line(rng: random.Random, russian: bool) -> str:
+    """Строка из случайных слов словаря, названий и чисел"""
+    vocabulary = _WORDS[russian]
+    words = []
+    for _ in range(rng.randint(5, 12)):
+        roll = rng.random()
+        if roll < 0.1:
+            words.append(_random_name(rng, russian))
+        elif roll < 0.15:
+            words.append(str(rng.randint(1, 2024)))
+        else:
+            words.append(rng.choice(vocabulary))
+    return " ".join(words).capitalize()
+
+RU_SECTIONS = ["Опыт работы", "Образование", "Навыки", "Контакты"]
+EN_SECTIONS = ["Experience", "Education", "Skills", "Contacts"]
+
+def generate_resume_text(rng: random.Random, size: int, ru_share: float = 0.7,
+                         skill_density: float = 0.15, word_level: bool = False) -> Tuple[str, List[str]]:
+    """Текст резюме примерно из size символов и список упомянутых навыков
+
+    skill_density — доля предложений, в которых упоминаются навыки. По
+    умолчанию строки берутся из нескольких шаблонных предложений, что
+    достаточно для парсеров; с word_level строки собираются из случайных
+    слов, названий и чисел и не повторяются, как в настоящих резюме.
+    """
+    russian = rng.random() < ru_share
+    sections = RU_SECTIONS if russian else EN_SECTIONS
+    sentences = RU_SENTENCES if russian else EN_SENTENCES
+    own_skills = rng.sample(SKILLS, rng.randint(4, 16))
+    years = rng.randint(1, 15)
+
+    lines = [f"{sections[0]}: {years} лет опыта" if russian else f"{sections[0]}: {years} years"]
+    length = len(lines[0])
+    mentioned = set()
+    section_index = 1
+
+    while length < size:
+        # Переключаемся между разделами по мере роста текста
+        if section_index < len(sections) and length > size * section_index / len(sections):
+            lines.append("")
+            lines.append(sections[section_index])
+            section_index += 1
+
+        if rng.random() < skill_density:
+            chosen = rng.sample(own_skills, min(len(own_skills), rng.randint(1, 4)))
+            mentioned.update(chosen)
+            line = ("Использовал: " if russian else "Used: ") + ", ".join(chosen)
+        else:
+            # Смешиваем языки внутри резюме в пропорции ru_share
+            pool_russian = rng.random() < ru_share
+            line_russian = pool_russian if rng.random() < 0.3 else russian
+            if word_level:
+                line = _random_line(rng, line_russian)
+            else:
+                line = rng.choice(RU_SENTENCES if line_russian else EN_SENTENCES)
+
+        lines.append(line)
+        length += len(line) + 1
+
+    return "\n".join(lines), sorted(mentioned)
+
+# Однобайтовая кодировка PDF: ASCII как есть, кириллица в кодах 128+
+_CYRILLIC = "АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯабвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+_PDF_CODES = {chr(code): code for code in range(32, 127)}
+_PDF_CODES.update({char: 128 + index for index, char in enumerate(_CYRILLIC)})
+
+def _encode_pdf_line(line: str) -> bytes:
+    """Строка PDF-литерала в однобайтовой кодировке с экранированием"""
+    result = bytearray()
+    for char in line:
+        code = _PDF_CODES.get(char, ord('?'))
+        if char in "\\()":
+            result += b"\\" + char.encode()
+        elif code > 126:
+            result += f"\\{code:03o}".encode()
+        else:
+            result.append(code)
+    return bytes(result)
+
+def _to_unicode_cmap() -> bytes:
+    """Карта ToUnicode для однобайтовой кодировки"""
+    entries = sorted((code, char) for char, code in _PDF_CODES.items())
+    blocks = []
+    for start in range(0, len(entries), 100):
+        chunk = entries[start:start + 100]
+        body = "\n".join(f"<{code:02X}> <{ord(char):04X}>" for code, char in chunk)
+        blocks.append(f"{len(chunk)} beginbfchar\n{body}\nendbfchar")
+    cmap = (
+        "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+        "1 begincodespacerange\n<00> <FF>\nendcodespacerange\n"
+        + "\n".join(blocks) +
+        "\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n"
+    )
+    return cmap.encode()
+
+def write_pdf(path: str, text: str, lines_per_page: int = 60):
+    """Запись текста в PDF, по lines_per_page строк на страницу"""
+    lines = text.split("\n")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = []  # тела объектов, номер объекта = индекс + 1
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    cmap = _to_unicode_cmap()
+    cmap_id = add(b"<< /Length %d >>\nstream\n" % len(cmap) + cmap + b"\nendstream")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /ToUnicode %d 0 R >>" % cmap_id)
+    pages_id = add(b"")  # заполняется после создания страниц
+
+    page_ids = []
+    for page_lines in pages:
+        content = b"BT /F1 10 Tf 12 TL 40 800 Td\n" + b"".join(
+            b"(" + _encode_pdf_line(line) + b") Tj T*\n" for line in page_lines
+        ) + b"ET"
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+
+    with open(path, "wb") as f:
+        f.write(output)
+
+def write_docx(path: str, text: str):
+    """Запись текста в DOCX, по абзацу на строку"""
+    import docx
+
+    document = docx.Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    document.save(path)
+
+def generate_corpus(out_dir: str, count: int, size: int, ru_share: float = 0.7,
+                    skill_density: float = 0.15, formats: Tuple[str, ...] = ("pdf", "docx"),
+                    seed: int = 42) -> List[Dict]:
+    """Сгенерировать count резюме в out_dir и вернуть манифест"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    writers = {"pdf": write_pdf, "docx": write_docx}
+    manifest = []
+
+    for index in range(count):
+        text, skills = generate_resume_text(rng, size, ru_share, skill_density)
+        file_format = formats[index % len(formats)]
+        filename = f"resume_{index:05d}.{file_format}"
+        writers[file_format](os.path.join(out_dir, filename), text)
+        manifest.append({"filename": filename, "format": file_format, "text_length": len(text), "skills": skills})
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор синтетических резюме")
+    parser.add_argument("out_dir", help="Директория для файлов")
+    parser.add_argument("--count", type=int, default=100, help="Количество резюме")
+    parser.add_argument("--size", type=int, default=3000, help="Длина текста в символах")
+    parser.add_argument("--ru-share", type=float, default=0.7, help="Доля русского текста, 0..1")
+    parser.add_argument("--skill-density", type=float, default=0.15, help="Доля строк с навыками, 0..1")
+    parser.add_argument("--formats", default="pdf,docx", help="Форматы через запятую")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    manifest = generate_corpus(
+        args.out_dir, args.count, args.size, args.ru_share, args.skill_density,
+        tuple(args.formats.split(",")), args.seed
+    )
+    print(f"✅ Создано {len(manifest)} резюме в {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Локальная замена api.hh.ru/vacancies для нагрузочных тестов
+
+Отдает заранее сгенерированные вакансии в формате HeadHunter
+с настраиваемой задержкой и долей ошибок. API направляется на него
+через переменные HH_API_URL и HH_API_TOKEN.
+
+Пример:
+    python -m benchmarks.fake_hh --port 8090 --latency-ms 120 --jitter-ms 40 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import random
+from typing import Dict, List
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from benchmarks.corpus import SKILLS
+
+CITIES = ["Москва", "Санкт-Петербург", "Новосибирск", "Казань", "Екатеринбург"]
+COMPANIES = ["TechCorp", "Digital Solutions", "Analytics Pro", "DataWorks", "CloudNine"]
+
+def canned_vacancies(count: int, seed: int) -> List[Dict]:
+    """Вакансии в формате ответа /vacancies"""
+    rng = random.Random(seed)
+    vacancies = []
+    for index in range(count):
+        skills = rng.sample(SKILLS, rng.randint(2, 6))
+        salary_from = rng.choice([None, 100000, 150000, 200000])
+        vacancies.append({
+            "id": str(100000 + index),
+            "name": f"{rng.choice(['Senior', 'Middle', 'Junior'])} {skills[0].title()} Developer",
+            "employer": {"name": rng.choice(COMPANIES)},
+            "area": {"name": rng.choice(CITIES)},
+            "salary": {"from": salary_from, "to": salary_from and salary_from + 100000, "currency": "RUR"}
+            if salary_from else None,
+            "alternate_url": f"https://hh.example/vacancy/{100000 + index}",
+            "snippet": {"requirement": "Опыт работы с " + ", ".join(skills)}
+        })
+    return vacancies
+
+def create_app(latency_ms: float = 100.0, jitter_ms: float = 30.0, error_rate: float = 0.0,
+               vacancies: int = 2000, seed: int = 42) -> FastAPI:
+    app = FastAPI(title="Fake HH API")
+    items = canned_vacancies(vacancies, seed)
+    rng = random.Random(seed)
+
+    @app.get("/vacancies")
+    async def get_vacancies(text: str = "", page: int = 0, per_page: int = 20):
+        delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+        if rng.random() < error_rate:
+            return JSONResponse(status_code=503, content={"errors": [{"type": "service_unavailable"}]})
+
+        per_page = max(1, min(per_page, 100))
+        terms = [term for term in text.lower().split() if term]
+        found = [item for item in items if any(term in item["snippet"]["requirement"].lower() for term in terms)]
+        found = found or items
+        start = page * per_page
+
+        return {
+            "items": found[start:start + per_page],
+            "found": len(found),
+            "page": page,
+            "pages": (len(found) + per_page - 1) // per_page,
+            "per_page": per_page
+        }
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Локальная замена API HeadHunter")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Средняя задержка ответа")
+    parser.add_argument("--jitter-ms", type=float, default=30.0, help="Стандартное отклонение задержки")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 503")
+    parser.add_argument("--vacancies", type=int, default=2000, help="Количество вакансий")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.vacancies, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест API с локальной заменой HeadHunter
+
+Генерирует запросы с заданной интенсивностью (поток Пуассона, открытая
+модель: новые запросы не ждут завершения предыдущих) к /upload-resume,
+/extract-skills и /search-jobs и считает пропускную способность,
+p50/p95/p99 и долю ошибок по каждому эндпоинту. Каждый запрос идет
+от случайного из --users пользователей (заголовок X-Client-Id), чтобы
+квоты API на клиента действовали как при реальной нагрузке. API учитывает
+X-Client-Id только вместе с токеном доверенного клиента (--client-token,
+по умолчанию ADMISSION_CLIENT_TOKEN; с --spawn генерируется сам), так
+же, как у бота.
+
+С флагом --spawn сам запускает fake HH и API в отдельных процессах,
+так что тест не требует сети.
+
+Пример:
+    python -m benchmarks.loadtest --spawn --rate 50 --duration 30
+    python -m benchmarks.loadtest --api-url http://localhost:8000 --mix upload=1,skills=4,search=2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.corpus import generate_corpus, generate_resume_text
+from benchmarks.stats import percentile
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Строка вида upload=1,skills=4,search=2 в словарь весов"""
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+def load_payloads(count: int, seed: int) -> Tuple[List[Tuple[str, bytes]], List[str]]:
+    """Файлы резюме для загрузки и тексты для /extract-skills"""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        manifest = generate_corpus(corpus_dir, count, 3000, seed=seed)
+        files = []
+        for item in manifest:
+            with open(os.path.join(corpus_dir, item["filename"]), "rb") as f:
+                files.append((item["filename"], f.read()))
+    texts = [generate_resume_text(rng, 3000)[0] for _ in range(count)]
+    return files, texts
+
+async def wait_until_ready(url: str, timeout: float = 30.0):
+    """Ожидание, пока сервис начнет отвечать"""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Сервис {url} не запустился за {timeout} c")
+
+def spawn_services(args) -> List[subprocess.Popen]:
+    """Запуск fake HH и API в отдельных процессах"""
+    fake_hh = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_hh",
+        "--port", str(args.hh_port),
+        "--latency-ms", str(args.hh_latency_ms),
+        "--jitter-ms", str(args.hh_jitter_ms),
+        "--error-rate", str(args.hh_error_rate)
+    ])
+    env = dict(os.environ, HH_API_URL=f"http://127.0.0.1:{args.hh_port}", HH_API_TOKEN="loadtest",
+               ADMISSION_CLIENT_TOKEN=args.client_token)
+    api = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(args.api_port), "--log-level", "warning"
+    ], env=env)
+    return [fake_hh, api]
+
+async def run(args) -> Dict:
+    files, texts = load_payloads(args.payloads, args.seed)
+    mix = parse_mix(args.mix)
+    endpoints = list(mix)
+    weights = [mix[name] for name in endpoints]
+    rng = random.Random(args.seed)
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    statuses = defaultdict(lambda: defaultdict(int))
+    dropped = 0
+    in_flight = 0
+
+    async def call(client: httpx.AsyncClient, endpoint: str):
+        nonlocal in_flight
+        in_flight += 1
+        headers = {"X-Client-Id": f"loadtest-{rng.randrange(args.users)}"}
+        if args.client_token:
+            headers["X-Client-Token"] = args.client_token
+        started = time.perf_counter()
+        try:
+            if endpoint == "upload":
+                filename, content = rng.choice(files)
+                response = await client.post(f"{args.api_url}/upload-resume", files={"file": (filename, content)},
+                                             headers=headers)
+            elif endpoint == "skills":
+                response = await client.post(f"{args.api_url}/extract-skills", json={"text": rng.choice(texts)},
+                                             headers=headers)
+            elif endpoint == "search":
+                skills = rng.sample(["Python", "Django", "Sql", "Docker", "React", "Go", "Aws"], 3)
+                response = await client.post(f"{args.api_url}/search-jobs", json={"skills": skills}, headers=headers)
+            else:
+                raise ValueError(f"Неизвестный эндпоинт: {endpoint}")
+            statuses[endpoint][response.status_code] += 1
+            if response.status_code >= 400:
+                errors[endpoint] += 1
+        except httpx.HTTPError:
+            statuses[endpoint]["transport"] += 1
+            errors[endpoint] += 1
+        finally:
+            latencies[endpoint].append(time.perf_counter() - started)
+            in_flight -= 1
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        tasks = set()
+        started = time.perf_counter()
+        next_arrival = started
+        while next_arrival - started < args.duration:
+            await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+            endpoint = rng.choices(endpoints, weights)[0]
+            if in_flight >= args.max_in_flight:
+                dropped += 1
+            else:
+                task = asyncio.create_task(call(client, endpoint))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            next_arrival += rng.expovariate(args.rate)
+        if tasks:
+            await asyncio.wait(tasks)
+        elapsed = time.perf_counter() - started
+
+    report = {"rate": args.rate, "duration": elapsed, "dropped": dropped, "endpoints": {}}
+    for endpoint in endpoints:
+        values = latencies[endpoint]
+        report["endpoints"][endpoint] = {
+            "requests": len(values),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "error_rate": round(errors[endpoint] / len(values), 4) if values else 0.0,
+            "statuses": {str(status): count for status, count in statuses[endpoint].items()}
+        }
+    return report
+
+def print_report(report: Dict):
+    print(f"\n📊 Интенсивность {report['rate']} req/s, длительность {report['duration']:.1f} c, "
+          f"отброшено клиентом: {report['dropped']}")
+    print(f"{'Эндпоинт':<10} {'запросов':>9} {'rps':>8} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} {'ошибки':>8}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:<10} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['error_rate']:>8.2%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест ResumeMate API")
+    parser.add_argument("--api-url", help="URL работающего API (по умолчанию запущенного через --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="Запустить fake HH и API локально")
+    parser.add_argument("--api-port", type=int, default=8001)
+    parser.add_argument("--hh-port", type=int, default=8090)
+    parser.add_argument("--hh-latency-ms", type=float, default=100.0)
+    parser.add_argument("--hh-jitter-ms", type=float, default=30.0)
+    parser.add_argument("--hh-error-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=20.0, help="Запросов в секунду")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность, c")
+    parser.add_argument("--mix", default="upload=1,skills=4,search=2", help="Веса эндпоинтов")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="Предел одновременных запросов")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Таймаут запроса, c")
+    parser.add_argument("--payloads", type=int, default=20, help="Разных резюме для загрузки")
+    parser.add_argument("--users", type=int, default=200, help="Разных клиентов (X-Client-Id)")
+    parser.add_argument("--client-token", default=os.getenv("ADMISSION_CLIENT_TOKEN", ""),
+                        help="Токен доверенного клиента для X-Client-Id")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    processes = []
+    if args.spawn:
+        args.client_token = args.client_token or secrets.token_hex(16)
+        processes = spawn_services(args)
+        args.api_url = args.api_url or f"http://127.0.0.1:{args.api_port}"
+    elif not args.api_url:
+        parser.error("укажите --api-url или --spawn")
+
+    try:
+        if args.spawn:
+            asyncio.run(wait_until_ready(f"http://127.0.0.1:{args.hh_port}/docs"))
+            asyncio.run(wait_until_ready(f"{args.api_url}/health"))
+        report = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Отчет сохранен в {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Сравнение памяти на одно резюме: словарь против CompactResume
+
+Экономия CompactResume зависит от того, насколько сжимается текст. По
+умолчанию текст собирается из случайных слов, названий и чисел; с
+--text-source sentences он повторяет несколько шаблонных предложений
+корпуса, сжимается намного лучше настоящих резюме, и результат — лишь
+верхняя граница.
+
+Пример:
+    python -m benchmarks.memory --count 100000
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+import zlib
+from typing import Callable, List, Tuple
+
+from benchmarks.corpus import generate_resume_text
+from resume_store import CompactResume
+
+def synthetic_resume(rng: random.Random, index: int, text_size: int,
+                     word_level: bool = True) -> Tuple[str, List[str], str]:
+    """Случайное резюме заданного размера"""
+    text, skills = generate_resume_text(rng, text_size, word_level=word_level)
+    # title() создает новые строки, как extract_skills_from_text
+    return text, [skill.title() for skill in skills], f"resume_{index}.pdf"
+
+def compression_ratio(text_size: int, seed: int, word_level: bool, sample: int = 200) -> float:
+    """Во сколько раз zlib сжимает тексты резюме (UTF-8)"""
+    rng = random.Random(seed)
+    raw = compressed = 0
+    for index in range(sample):
+        encoded = synthetic_resume(rng, index, text_size, word_level)[0].encode("utf-8")
+        raw += len(encoded)
+        compressed += len(zlib.compress(encoded))
+    return raw / compressed
+
+def measure(count: int, text_size: int, seed: int, build: Callable, word_level: bool = True) -> int:
+    """Прирост памяти после создания count записей, в байтах"""
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    storage = {}
+    for index in range(count):
+        text, skills, filename = synthetic_resume(rng, index, text_size, word_level)
+        storage[f"resume_{index + 1}"] = build(text, skills, filename)
+        del text, skills
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del storage
+    return used
+
+def main():
+    parser = argparse.ArgumentParser(description="Память хранилища резюме: dict против CompactResume")
+    parser.add_argument("--count", type=int, default=100000, help="Количество синтетических резюме")
+    parser.add_argument("--text-size", type=int, default=2000, help="Длина текста резюме в символах")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--text-source", choices=("words", "sentences"), default="words",
+                        help="Случайные слова или шаблонные предложения корпуса (верхняя граница)")
+    args = parser.parse_args()
+    word_level = args.text_source == "words"
+
+    layouts = [
+        ("dict", lambda text, skills, filename: {"text": text, "skills": skills, "filename": filename}),
+        ("CompactResume", CompactResume),
+    ]
+
+    print(f"🧪 {args.count} резюме по ~{args.text_size} символов, текст: {args.text_source}, "
+          f"zlib сжимает его в {compression_ratio(args.text_size, args.seed, word_level):.1f} раза")
+    results = {}
+    for name, build in layouts:
+        used = measure(args.count, args.text_size, args.seed, build, word_level)
+        results[name] = used
+        print(f"   {name:<14} {used / args.count:>10.0f} байт/резюме  {used / 2 ** 20:>9.1f} МБ всего")
+
+    saving = results['dict'] / results['CompactResume']
+    if word_level:
+        print(f"📉 Экономия: в {saving:.1f} раза")
+    else:
+        print(f"📉 Экономия: в {saving:.1f} раза (верхняя граница: предложения корпуса повторяются)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Набор бенчмарков разбора резюме, извлечения навыков, match score и аудита
+
+Корпус генерируется заново с фиксированным seed, сеть не нужна.
+Результаты сохраняются в JSON и сравниваются с сохраненным baseline.
+
+Пример:
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Sequence
+
+from benchmarks.corpus import SKILLS, generate_corpus, generate_resume_text
+
+# Профили корпуса: размер текста в символах
+SIZES = {"small": 1000, "medium": 4000, "large": 16000}
+
+def time_calls(func: Callable, inputs: Sequence, repeat: int) -> Dict:
+    """Время одного вызова func по всем inputs: медиана и минимум по повторам"""
+    per_call = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in inputs:
+            func(item)
+        per_call.append((time.perf_counter() - started) / len(inputs))
+    return {
+        "median_us": round(statistics.median(per_call) * 1e6, 2),
+        "min_us": round(min(per_call) * 1e6, 2),
+        "calls": len(inputs) * repeat
+    }
+
+def synthetic_vacancies(rng: random.Random, count: int) -> List[Dict]:
+    """Вакансии в формате ответа API HeadHunter"""
+    vacancies = []
+    for index in range(count):
+        skills = rng.sample(SKILLS, rng.randint(2, 6))
+        vacancies.append({
+            "id": str(index),
+            "name": f"{rng.choice(['Senior', 'Middle', 'Junior'])} {skills[0].title()} Developer",
+            "snippet": {"requirement": "Опыт работы с " + ", ".join(skills)}
+        })
+    return vacancies
+
+def run_benchmarks(count: int, repeat: int, seed: int) -> Dict[str, Dict]:
+    from main import extract_text_from_pdf, extract_text_from_docx, extract_skills_from_text
+    from jobs import JobSearchService, ResumeAuditService
+    from matching import MatchingEngine
+
+    results = {}
+    rng = random.Random(seed)
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        for profile, size in SIZES.items():
+            profile_dir = os.path.join(corpus_dir, profile)
+            manifest = generate_corpus(profile_dir, count, size, seed=seed)
+            paths = {
+                file_format: [os.path.join(profile_dir, item["filename"]) for item in manifest if item["format"] == file_format]
+                for file_format in ("pdf", "docx")
+            }
+            results[f"extract_text_from_pdf[{profile}]"] = time_calls(extract_text_from_pdf, paths["pdf"], repeat)
+            results[f"extract_text_from_docx[{profile}]"] = time_calls(extract_text_from_docx, paths["docx"], repeat)
+
+    texts = {
+        profile: [generate_resume_text(rng, size)[0] for _ in range(count)]
+        for profile, size in SIZES.items()
+    }
+    for profile, profile_texts in texts.items():
+        results[f"extract_skills_from_text[{profile}]"] = time_calls(extract_skills_from_text, profile_texts, repeat)
+
+    job_service = JobSearchService()
+    vacancies = synthetic_vacancies(rng, 200)
+    user_skills = [skill.title() for skill in rng.sample(SKILLS, 12)]
+    results["JobSearchService._calculate_match_score"] = time_calls(
+        lambda vacancy: job_service._calculate_match_score(user_skills, vacancy), vacancies, repeat
+    )
+
+    engine = MatchingEngine()
+    for index in range(5000):
+        engine.upsert_resume(index, [skill.title() for skill in rng.sample(SKILLS, rng.randint(4, 16))])
+    for index in range(2000):
+        engine.upsert_vacancy(index, [skill.title() for skill in rng.sample(SKILLS, rng.randint(2, 6))])
+    results["MatchingEngine.top_vacancies"] = time_calls(lambda index: engine.top_vacancies(index, 10), range(50), repeat)
+    results["MatchingEngine.top_resumes"] = time_calls(lambda index: engine.top_resumes(index, 10), range(50), repeat)
+
+    audit_service = ResumeAuditService()
+    audit_inputs = [(text, extract_skills_from_text(text)) for text in texts["medium"]]
+    loop = asyncio.new_event_loop()
+    try:
+        results["ResumeAuditService.audit_resume"] = time_calls(
+            lambda item: loop.run_until_complete(audit_service.audit_resume(*item)), audit_inputs, repeat
+        )
+    finally:
+        loop.close()
+
+    return results
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Печать сравнения с baseline по минимальному времени, возвращает список регрессий"""
+    regressions = []
+    print(f"\n{'Бенчмарк':<48} {'baseline':>11} {'сейчас':>11} {'изм.':>8}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<48} {'—':>11} {result['min_us']:>9.1f}µs {'new':>8}")
+            continue
+        change = result["min_us"] / previous["min_us"] - 1
+        marker = " ⚠️" if change > threshold else ""
+        print(f"{name:<48} {previous['min_us']:>9.1f}µs {result['min_us']:>9.1f}µs {change:>+7.1%}{marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки ResumeMate")
+    parser.add_argument("--count", type=int, default=20, help="Документов на профиль размера")
+    parser.add_argument("--repeat", type=int, default=5, help="Повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON с baseline для сравнения")
+    parser.add_argument("--save-baseline", help="Сохранить результаты как baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Допустимое замедление, доля")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.count, args.repeat, args.seed)
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "count": args.count,
+            "repeat": args.repeat,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+    for name, result in results.items():
+        print(f"{name:<48} {result['median_us']:>10.1f} µs (min {result['min_us']:.1f})")
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Результаты сохранены в {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Регрессии ({len(regressions)}): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ Регрессий нет")
+
+if __name__ == "__main__":
+    main()
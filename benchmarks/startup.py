@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Замер холодного старта API: время импорта main и память процесса
+
+Каждый замер выполняется в новом интерпретаторе. С --with-parsers
+дополнительно импортируются PyPDF2 и python-docx, чтобы увидеть цену
+их загрузки в воркере.
+
+Пример:
+    python -m benchmarks.startup --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+CHILD_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter() - started
+if {with_parsers}:
+    main._preload_parsers()
+total = time.perf_counter() - started
+print(json.dumps({{
+    "import_seconds": imported,
+    "total_seconds": total,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "parsers_loaded": "PyPDF2" in sys.modules
+}}))
+"""
+
+def measure(with_parsers: bool, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", CHILD_SCRIPT.format(with_parsers=with_parsers)])
+        samples.append(json.loads(output.decode().strip().splitlines()[-1]))
+    return {
+        "total_ms": round(statistics.median(sample["total_seconds"] for sample in samples) * 1000, 1),
+        "max_rss_mb": round(statistics.median(sample["max_rss_mb"] for sample in samples), 1),
+        "parsers_loaded": samples[-1]["parsers_loaded"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер холодного старта API")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество запусков")
+    parser.add_argument("--with-parsers", action="store_true", help="Сравнить с загрузкой парсеров")
+    args = parser.parse_args()
+
+    variants = [("main", False)]
+    if args.with_parsers:
+        variants.append(("main + парсеры", True))
+
+    for name, with_parsers in variants:
+        result = measure(with_parsers, args.repeat)
+        print(f"{name:<16} {result['total_ms']:>8.1f} мс  {result['max_rss_mb']:>7.1f} МБ  "
+              f"парсеры загружены: {'да' if result['parsers_loaded'] else 'нет'}")
+
+if __name__ == "__main__":
+    main()
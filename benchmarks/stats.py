@@ -0,0 +1,9 @@
+from typing import List
+
+def percentile(values: List[float], p: float) -> float:
+    """Перцентиль выборки (ближайший ранг)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Стенд для замера пропускной способности webhook-режима бота
+
+Отправляет синтетические обновления Telegram на webhook и считает
+задержку подтверждения и скорость обработки. По умолчанию поднимает
+приложение бота в этом же процессе с локальной сессией, которая
+не ходит в Telegram.
+
+Пример:
+    python -m benchmarks.webhook --updates 5000 --concurrency 100
+    python -m benchmarks.webhook --url http://localhost:8080/telegram/webhook --secret ...
+"""
+
+import argparse
+import asyncio
+import os
+import secrets
+import time
+from typing import Dict
+
+# Фиктивный токен нужен только для импорта bot.py без .env
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456789:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA")
+
+import aiohttp
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from pydantic import BaseModel
+
+from benchmarks.stats import percentile
+
+
+class LocalSession(BaseSession):
+    """Сессия бота, отвечающая на запросы к Bot API без сети"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = 0
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests += 1
+        returning = getattr(method, "__returning__", None)
+        if isinstance(returning, type) and issubclass(returning, BaseModel):
+            return returning.model_construct()
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def build_update(update_id: int) -> Dict:
+    """Синтетическое обновление: команды и нажатия кнопок по кругу"""
+    user_id = 100000 + update_id % 1000
+    user = {"id": user_id, "is_bot": False, "first_name": "Load"}
+    chat = {"id": user_id, "type": "private"}
+    kind = update_id % 3
+
+    if kind == 2:
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": user,
+                "chat_instance": str(user_id),
+                "data": "help",
+                "message": {"message_id": update_id, "date": int(time.time()), "chat": chat, "text": "menu"}
+            }
+        }
+
+    command = "/start" if kind == 0 else "/resume"
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": chat,
+            "from": user,
+            "text": command,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        }
+    }
+
+
+async def start_local_app(host: str, port: int, secret: str):
+    """Поднять приложение бота в этом процессе"""
+    from aiohttp import web
+    import bot as bot_module
+
+    processed = []
+
+    async def count_processed(handler, event, data):
+        try:
+            return await handler(event, data)
+        finally:
+            processed.append(time.perf_counter())
+
+    session = LocalSession()
+    local_bot = Bot(token=os.environ["TELEGRAM_BOT_TOKEN"], session=session)
+    bot_module.dp.update.outer_middleware(count_processed)
+
+    app = bot_module.create_webhook_app(bot_instance=local_bot, secret_token=secret)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner, processed, session
+
+
+async def run(args):
+    runner = None
+    processed = None
+    url = args.url
+
+    if not url:
+        import bot as bot_module
+        args.secret = args.secret or bot_module.WEBHOOK_SECRET or secrets.token_hex(16)
+        runner, processed, session = await start_local_app("127.0.0.1", args.port, args.secret)
+        url = f"http://127.0.0.1:{args.port}{bot_module.WEBHOOK_PATH}"
+
+    headers = {}
+    if args.secret:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = args.secret
+
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for update_id in range(1, args.updates + 1):
+        queue.put_nowait(build_update(update_id))
+
+    async def worker(http: aiohttp.ClientSession):
+        nonlocal errors
+        while not queue.empty():
+            update = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                async with http.post(url, json=update, headers=headers) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        await asyncio.gather(*(worker(http) for _ in range(args.concurrency)))
+    acked = time.perf_counter() - started
+
+    print(f"📨 Отправлено обновлений: {args.updates}, ошибок: {errors}")
+    print(f"⚡ Подтверждение: {args.updates / acked:.0f} upd/s за {acked:.2f} c")
+    print(f"   p50={percentile(latencies, 50) * 1000:.1f} мс "
+          f"p95={percentile(latencies, 95) * 1000:.1f} мс "
+          f"p99={percentile(latencies, 99) * 1000:.1f} мс")
+
+    if processed is not None:
+        deadline = time.perf_counter() + args.drain_timeout
+        while len(processed) < args.updates - errors and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        if processed:
+            total = max(processed) - started
+            print(f"⚙️ Обработано: {len(processed)} за {total:.2f} c ({len(processed) / total:.0f} upd/s), "
+                  f"запросов к Bot API: {session.requests}")
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный стенд webhook-режима бота")
+    parser.add_argument("--url", help="URL работающего webhook; без него приложение поднимается локально")
+    parser.add_argument("--secret", default="", help="Секрет X-Telegram-Bot-Api-Secret-Token")
+    parser.add_argument("--updates", type=int, default=2000, help="Количество обновлений")
+    parser.add_argument("--concurrency", type=int, default=50, help="Одновременных запросов")
+    parser.add_argument("--port", type=int, default=8089, help="Порт локального приложения")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Ожидание фоновой обработки, c")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
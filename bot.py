@@ -1,11 +1,15 @@
 import asyncio
+import json
 import logging
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 import httpx
 import os
+import time
 from dotenv import load_dotenv
+from bot_state import create_state_store
+from prewarm import PrewarmScheduler
 
 # Загрузка переменных окружения
 load_dotenv()
@@ -21,22 +25,56 @@ dp = Dispatcher()
 # URL FastAPI сервера
 API_BASE_URL = f"http://{os.getenv('FASTAPI_HOST', 'localhost')}:{os.getenv('FASTAPI_PORT', '8000')}"
 
-# Хранилище состояний пользователей
-user_data = {}
-
-async def send_api_request(endpoint: str, method: str = "GET", data: dict = None, files: dict = None):
-    """Вспомогательная функция для отправки запросов к API"""
+# Настройки webhook-режима
+WEBHOOK_BASE_URL = os.getenv('BOT_WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('BOT_WEBHOOK_PATH', '/telegram/webhook')
+WEBHOOK_SECRET = os.getenv('BOT_WEBHOOK_SECRET', '')
+WEBHOOK_HOST = os.getenv('BOT_WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('BOT_WEBHOOK_PORT', '8080'))
+
+# Настройки фонового прогрева вакансий
+PREWARM_ENABLED = os.getenv('PREWARM_ENABLED', 'true').lower() == 'true'
+PREWARM_INTERVAL = float(os.getenv('PREWARM_INTERVAL', '300'))
+PREWARM_JITTER = float(os.getenv('PREWARM_JITTER', '0.2'))
+PREWARM_CONCURRENCY = int(os.getenv('PREWARM_CONCURRENCY', '2'))
+PREWARM_ACTIVE_WINDOW = float(os.getenv('PREWARM_ACTIVE_WINDOW', '3600'))
+PREWARM_LATENCY_THRESHOLD = float(os.getenv('PREWARM_LATENCY_THRESHOLD', '2.0'))
+
+# Хранилище состояний пользователей: memory для одного процесса,
+# sqlite:<путь> для нескольких webhook-воркеров
+state_store = create_state_store(os.getenv('BOT_STATE_STORE', 'memory'))
+
+# Токен доверенного клиента: без него API не учитывает X-Client-Id
+ADMISSION_CLIENT_TOKEN = os.getenv('ADMISSION_CLIENT_TOKEN', '')
+
+def client_headers(user_id: int = None) -> dict:
+    """Заголовки X-Client-Id и X-Client-Token для квот API"""
+    if user_id is None or not ADMISSION_CLIENT_TOKEN:
+        return {}
+    return {"X-Client-Id": f"tg:{user_id}", "X-Client-Token": ADMISSION_CLIENT_TOKEN}
+
+async def send_api_request(endpoint: str, method: str = "GET", data: dict = None, files: dict = None,
+                           params: dict = None, timeout: float = 30.0, foreground: bool = True,
+                           user_id: int = None):
+    """Вспомогательная функция для отправки запросов к API
+
+    Задержка запросов пользователей (foreground) учитывается планировщиком
+    прогрева: при ее росте фоновые обновления выполняются реже. user_id
+    передается в X-Client-Id, чтобы квоты API действовали на каждого
+    пользователя Telegram отдельно.
+    """
     url = f"{API_BASE_URL}{endpoint}"
+    started = time.monotonic()
 
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(timeout=timeout, headers=client_headers(user_id)) as client:
         try:
             if method == "GET":
-                response = await client.get(url)
+                response = await client.get(url, params=params)
             elif method == "POST":
                 if files:
-                    response = await client.post(url, files=files, data=data)
+                    response = await client.post(url, files=files, data=data, params=params)
                 else:
-                    response = await client.post(url, json=data)
+                    response = await client.post(url, json=data, params=params)
             else:
                 raise ValueError(f"Неподдерживаемый метод: {method}")
 
@@ -49,6 +87,38 @@ async def send_api_request(endpoint: str, method: str = "GET", data: dict = None
         except Exception as e:
             logger.error(f"Ошибка при запросе к API: {str(e)}")
             return {"error": f"Ошибка соединения: {str(e)}"}
+        finally:
+            if foreground:
+                prewarm_scheduler.record_foreground_latency(time.monotonic() - started)
+
+async def prewarm_jobs(resume_id: str) -> list:
+    """Фоновый поиск вакансий для резюме"""
+    result = await send_api_request("/search-jobs", "POST", {"resume_id": resume_id}, foreground=False)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result["jobs"]
+
+prewarm_scheduler = PrewarmScheduler(
+    prewarm_jobs,
+    state_store,
+    interval=PREWARM_INTERVAL,
+    jitter=PREWARM_JITTER,
+    max_concurrency=PREWARM_CONCURRENCY,
+    active_window=PREWARM_ACTIVE_WINDOW,
+    latency_threshold=PREWARM_LATENCY_THRESHOLD,
+    enabled=PREWARM_ENABLED
+)
+
+@dp.startup()
+async def start_prewarm(run_prewarm: bool = True):
+    # При нескольких webhook-воркерах цикл прогрева работает только в одном
+    if run_prewarm:
+        prewarm_scheduler.start()
+
+@dp.shutdown()
+async def stop_prewarm():
+    await prewarm_scheduler.stop()
+    await state_store.close()
 
 @dp.message(Command("start"))
 async def cmd_start(message: types.Message):
@@ -81,7 +151,7 @@ async def cmd_start(message: types.Message):
 async def cmd_resume(message: types.Message):
     """Обработка команды /resume"""
     user_id = message.from_user.id
-    user_data[user_id] = {"awaiting_resume": True}
+    await state_store.set(user_id, {"awaiting_resume": True})
 
     await message.answer(
         "📄 Отправьте PDF или DOCX файл с вашим резюме.\n"
@@ -91,29 +161,107 @@ async def cmd_resume(message: types.Message):
 @dp.message(Command("search"))
 async def cmd_search(message: types.Message):
     """Обработка команды /search"""
-    # Показываем первую вакансию
-    await show_job(message, 0)
+    await start_job_search(message, message.from_user.id)
+
+async def start_job_search(message: types.Message, user_id: int):
+    """Поиск вакансий по резюме пользователя или показ демо-вакансий"""
+    resume_id = (await state_store.get(user_id)).get("resume_id")
+    if resume_id:
+        await prewarm_scheduler.touch(resume_id)
+        jobs = await prewarm_scheduler.get(resume_id)
+        if jobs:
+            # Результаты уже подготовлены в фоне
+            await state_store.update(user_id, jobs=jobs)
+            await show_job(message, 0)
+        else:
+            await stream_job_search(message, user_id, resume_id)
+    else:
+        # Показываем первую вакансию
+        await show_job(message, 0)
+
+async def stream_job_search(message: types.Message, user_id: int, resume_id: str):
+    """Потоковый поиск: первая вакансия показывается, как только пришла от API"""
+    jobs = []
+    await state_store.update(user_id, jobs=jobs, jobs_loading=True)
+    first_shown = False
+    started = time.monotonic()
+    progress_message = await message.answer("🔍 Ищу подходящие вакансии...")
+
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=60.0), headers=client_headers(user_id)) as client:
+            async with client.stream(
+                "POST", f"{API_BASE_URL}/search-jobs/stream", json={"resume_id": resume_id}
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event["type"] == "vacancy":
+                        jobs.append(event["job"])
+                        # Сохраняем каждую вакансию: следующее нажатие может обработать другой воркер
+                        await state_store.update(user_id, jobs=jobs)
+                        if not first_shown:
+                            first_shown = True
+                            prewarm_scheduler.record_foreground_latency(time.monotonic() - started)
+                            await progress_message.delete()
+                            await show_job(message, 0)
+                    elif event["type"] == "summary":
+                        logger.info(f"Поиск для {user_id}: {event['total']} вакансий за {event['elapsed_ms']} мс")
+    except Exception as e:
+        logger.error(f"Ошибка при потоковом поиске вакансий: {str(e)}")
+    finally:
+        await state_store.update(user_id, jobs_loading=None)
+
+    if not first_shown:
+        await progress_message.delete()
+        # Ничего не нашли: показываем демо-вакансии
+        await state_store.update(user_id, jobs=None)
+        await show_job(message, 0)
+
+async def get_user_jobs(user_id: int) -> list:
+    """Вакансии последнего поиска пользователя или демо-вакансии"""
+    jobs = (await state_store.get(user_id)).get("jobs")
+    if jobs:
+        return jobs
+
+    from jobs import JobSearchService
+
+    job_service = JobSearchService()
+    return await job_service.get_sample_jobs()
+
+async def find_user_job(user_id: int, job_id: str):
+    """Вакансия по id среди результатов поиска пользователя и демо-вакансий
+
+    Список вакансий меняется (новый поиск, прогрев), поэтому кнопки
+    ссылаются на id, а не на позицию в списке. None, если вакансии уже нет.
+    """
+    from jobs import JobSearchService
+
+    jobs = (await state_store.get(user_id)).get("jobs") or []
+    jobs = jobs + await JobSearchService().get_sample_jobs()
+    return next((job for job in jobs if str(job['id']) == job_id), None)
 
 async def show_job(message: types.Message, job_index: int = 0):
     """Показать одну вакансию"""
     try:
-        from jobs import JobSearchService
-
-        job_service = JobSearchService()
-        jobs = await job_service.get_sample_jobs()
+        # В личном чате id чата совпадает с id пользователя
+        user_id = message.chat.id
+        jobs = await get_user_jobs(user_id)
+        loading = (await state_store.get(user_id)).get("jobs_loading", False)
 
-        if job_index >= len(jobs):
-            await message.answer("❌ Больше вакансий нет")
+        if not 0 <= job_index < len(jobs):
+            await message.answer("⏳ Вакансии еще загружаются" if loading else "❌ Больше вакансий нет")
             return
 
         job = jobs[job_index]
 
         # Проверяем, есть ли еще вакансии
-        has_next = job_index + 1 < len(jobs)
+        has_next = job_index + 1 < len(jobs) or loading
         has_prev = job_index > 0
 
         job_text = f"""
-🔍 Вакансия {job_index + 1} из {len(jobs)}
+🔍 Вакансия {job_index + 1} из {len(jobs)}{'+' if loading else ''}
 
 🏢 {job['title']}
 🏢 {job['company']}
@@ -134,8 +282,8 @@ async def show_job(message: types.Message, job_index: int = 0):
 
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [
-                InlineKeyboardButton(text="✅ Откликнуться", callback_data=f"apply_job_{job_index}"),
-                InlineKeyboardButton(text="❌ Пропустить", callback_data=f"skip_job_{job_index}")
+                InlineKeyboardButton(text="✅ Откликнуться", callback_data=f"apply_job_{job['id']}"),
+                InlineKeyboardButton(text="❌ Пропустить", callback_data=f"skip_job_{job['id']}")
             ]
         ])
 
@@ -168,16 +316,18 @@ async def handle_callbacks(callback: CallbackQuery):
     """Обработка нажатий на кнопки"""
     user_id = callback.from_user.id
     data = callback.data
+    # Подтверждаем нажатие сразу, чтобы кнопка не зависла при ошибке в обработке
+    await callback.answer()
 
     if data == "upload_resume":
-        user_data[user_id] = {"awaiting_resume": True}
+        await state_store.set(user_id, {"awaiting_resume": True})
         await callback.message.answer(
             "📄 Отправьте PDF или DOCX файл с вашим резюме.\n"
             "Я извлеку ключевые навыки и подготовлю анализ."
         )
 
     elif data == "search_jobs":
-        await show_job(callback.message, 0)
+        await start_job_search(callback.message, user_id)
 
     elif data == "help":
         help_text = """
@@ -210,36 +360,75 @@ async def handle_callbacks(callback: CallbackQuery):
         await show_job(callback.message, current_index - 1)
 
     elif data.startswith("apply_job_"):
-        job_index = int(data.split("_")[-1])
-        from jobs import JobSearchService
-        job_service = JobSearchService()
-        jobs = await job_service.get_sample_jobs()
-        job = jobs[job_index]
-
-        await callback.message.answer(
-            f"📝 Генерация сопроводительного письма для вакансии:\n\n"
-            f"🏢 {job['title']}\n"
-            f"🏢 {job['company']}\n\n"
-            "Это демо-функция. В реальной версии здесь будет:\n"
-            "• Персонализированное сопроводительное письмо\n"
-            "• Заполнение формы отклика\n"
-            "• Отправка через API HH.ru или email"
-        )
+        job = await find_user_job(user_id, data[len("apply_job_"):])
+        if job is None:
+            await callback.message.answer("❌ Вакансия больше недоступна. Запустите поиск заново: /search")
+        else:
+            await callback.message.answer(
+                f"📝 Генерация сопроводительного письма для вакансии:\n\n"
+                f"🏢 {job['title']}\n"
+                f"🏢 {job['company']}\n\n"
+                "Это демо-функция. В реальной версии здесь будет:\n"
+                "• Персонализированное сопроводительное письмо\n"
+                "• Заполнение формы отклика\n"
+                "• Отправка через API HH.ru или email"
+            )
 
     elif data.startswith("skip_job_"):
-        job_index = int(data.split("_")[-1])
-        from jobs import JobSearchService
-        job_service = JobSearchService()
-        jobs = await job_service.get_sample_jobs()
-        job = jobs[job_index]
-
-        await callback.message.answer(
-            f"❌ Вакансия пропущена:\n"
-            f"🏢 {job['title']} - {job['company']}\n\n"
-            "Показать следующую вакансию?"
-        )
+        job = await find_user_job(user_id, data[len("skip_job_"):])
+        if job is None:
+            await callback.message.answer("❌ Вакансия больше недоступна. Запустите поиск заново: /search")
+        else:
+            await callback.message.answer(
+                f"❌ Вакансия пропущена:\n"
+                f"🏢 {job['title']} - {job['company']}\n\n"
+                "Показать следующую вакансию?"
+            )
 
-    await callback.answer()
+def format_version_changes(version: dict) -> str:
+    """Описание изменений по сравнению с предыдущей версией резюме"""
+    if not version or not version.get("previous_resume_id"):
+        return ""
+
+    lines = [f"🔄 Версия {version['version']}: обновлено разделов — {len(version['changed_sections'])}"]
+    if version["skills_added"]:
+        lines.append(f"➕ Новые навыки: {', '.join(version['skills_added'])}")
+    if version["skills_removed"]:
+        lines.append(f"➖ Убраны навыки: {', '.join(version['skills_removed'])}")
+    if not version["skills_added"] and not version["skills_removed"]:
+        lines.append("Набор навыков не изменился")
+    return "\n".join(lines) + "\n"
+
+async def wait_for_resume_job(message: types.Message, job_id: str, timeout: float = 300.0) -> dict:
+    """Ожидание фоновой обработки резюме с отображением прогресса"""
+    status_labels = {
+        "queued": "⏳ Резюме в очереди на обработку...",
+        "processing": "⚙️ Извлекаю текст и навыки из резюме..."
+    }
+    progress_message = await message.answer(status_labels["queued"])
+    shown_status = "queued"
+    deadline = asyncio.get_running_loop().time() + timeout
+
+    while asyncio.get_running_loop().time() < deadline:
+        # Long-poll: API ответит при завершении задачи или через wait секунд
+        job = await send_api_request(f"/jobs/{job_id}", params={"wait": 10}, timeout=20.0,
+                                     foreground=False)
+        if "error" in job:
+            return job
+
+        status = job.get("status")
+        if status == "done":
+            await progress_message.delete()
+            return job["result"]
+        if status == "failed":
+            await progress_message.delete()
+            return {"error": job.get("error")}
+
+        if status != shown_status and status in status_labels:
+            await progress_message.edit_text(status_labels[status])
+            shown_status = status
+
+    return {"error": "Превышено время ожидания обработки"}
 
 @dp.message()
 async def handle_files(message: types.Message):
@@ -247,7 +436,7 @@ async def handle_files(message: types.Message):
     user_id = message.from_user.id
 
     # Проверяем, ожидает ли пользователь загрузки резюме
-    if user_data.get(user_id, {}).get("awaiting_resume"):
+    if (await state_store.get(user_id)).get("awaiting_resume"):
         if message.document:
             # Получаем информацию о файле
             file = message.document
@@ -269,16 +458,23 @@ async def handle_files(message: types.Message):
                 # Загружаем файл локально для отправки в API
                 await bot.download_file(file_path, f"temp_{file.file_id}")
 
-                # Отправляем файл в наш API
+                # Отправляем файл в наш API, обработка идет в фоне
                 with open(f"temp_{file.file_id}", 'rb') as f:
                     files = {'file': (file.file_name, f, file.mime_type)}
 
-                    api_response = await send_api_request("/upload-resume", "POST", files=files)
+                    # user_id связывает повторные загрузки файла в версии одного резюме
+                    api_response = await send_api_request(
+                        "/upload-resume", "POST", data={"user_id": str(user_id)}, files=files,
+                        params={"async_mode": "true"}, user_id=user_id
+                    )
 
                 # Удаляем временный файл
                 if os.path.exists(f"temp_{file.file_id}"):
                     os.remove(f"temp_{file.file_id}")
 
+                if "job_id" in api_response:
+                    api_response = await wait_for_resume_job(message, api_response["job_id"])
+
                 if "error" in api_response:
                     await message.answer(
                         f"❌ Ошибка при обработке резюме: {api_response['error']}\n"
@@ -288,6 +484,7 @@ async def handle_files(message: types.Message):
                     # Показываем результаты анализа
                     skills = api_response.get('skills', [])
                     resume_id = api_response.get('resume_id')
+                    changes_text = format_version_changes(api_response.get('version'))
 
                     response_text = f"""
 ✅ Резюме успешно обработано!
@@ -296,7 +493,7 @@ async def handle_files(message: types.Message):
 {', '.join(skills[:10])}
 
 {'...' if len(skills) > 10 else ''}
-
+{changes_text}
 🔍 Что дальше?
 Теперь вы можете использовать команду /search для поиска вакансий,
 которые соответствуют вашим навыкам.
@@ -307,7 +504,8 @@ ID резюме: {resume_id}
                     await message.answer(response_text)
 
                     # Сбрасываем состояние ожидания
-                    user_data[user_id] = {"resume_id": resume_id}
+                    await state_store.set(user_id, {"resume_id": resume_id})
+                    await prewarm_scheduler.touch(resume_id)
 
             except Exception as e:
                 logger.error(f"Ошибка при обработке файла: {str(e)}")
@@ -322,6 +520,69 @@ ID резюме: {resume_id}
                 "Используйте команду /resume для начала процесса."
             )
 
+def create_webhook_app(bot_instance: Bot = None, register_webhook: bool = False, secret_token: str = None,
+                       run_prewarm: bool = True):
+    """Создание aiohttp-приложения, принимающего обновления Telegram через webhook
+
+    Обновление подтверждается сразу после проверки секрета, а обработка
+    выполняется в фоне, поэтому Telegram не ждет ответа хендлеров. Без
+    секрета приложение не создается: иначе любой, кто достучится до порта,
+    сможет присылать поддельные обновления.
+    """
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    secret_token = secret_token or WEBHOOK_SECRET
+    if not secret_token:
+        raise RuntimeError("BOT_WEBHOOK_SECRET обязателен в webhook-режиме")
+
+    bot_instance = bot_instance or bot
+    app = web.Application()
+
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot_instance,
+        handle_in_background=True,
+        secret_token=secret_token
+    ).register(app, path=WEBHOOK_PATH)
+
+    if register_webhook:
+        async def on_startup(app):
+            if not WEBHOOK_BASE_URL:
+                logger.warning("BOT_WEBHOOK_URL не задан, webhook не зарегистрирован")
+                return
+            await bot_instance.set_webhook(
+                f"{WEBHOOK_BASE_URL.rstrip('/')}{WEBHOOK_PATH}",
+                secret_token=secret_token,
+                allowed_updates=dp.resolve_used_update_types()
+            )
+            logger.info("Webhook зарегистрирован")
+
+        app.on_startup.append(on_startup)
+
+    setup_application(app, dp, bot=bot_instance, run_prewarm=run_prewarm)
+    return app
+
+def run_webhook(worker_index: int = 0):
+    """Запуск бота в webhook-режиме
+
+    Несколько воркеров слушают один порт (SO_REUSEPORT), ядро распределяет
+    между ними соединения. Webhook в Telegram регистрирует и прогрев
+    вакансий выполняет только воркер 0; состояние пользователей воркеры
+    делят через state_store.
+    """
+    from aiohttp import web
+
+    app = create_webhook_app(register_webhook=worker_index == 0, run_prewarm=worker_index == 0)
+    logger.info(f"Запуск webhook-воркера {worker_index} на {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    web.run_app(
+        app,
+        host=WEBHOOK_HOST,
+        port=WEBHOOK_PORT,
+        reuse_port=True,
+        print=None
+    )
+
 async def main():
     """Запуск бота"""
     try:
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+class MemoryStateStore:
+    """Состояние бота в памяти процесса
+
+    Подходит для polling и одного webhook-процесса. Значение None в
+    update удаляет поле.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._users: Dict[int, Dict] = {}
+        self._activity: Dict[str, float] = {}
+        self._prewarmed: Dict[str, Tuple[List[Dict], float]] = {}
+
+    async def get(self, user_id: int) -> Dict:
+        """Копия состояния пользователя"""
+        return dict(self._users.get(user_id, {}))
+
+    async def set(self, user_id: int, state: Dict):
+        self._users[user_id] = dict(state)
+
+    async def update(self, user_id: int, **fields) -> Dict:
+        state = self._users.setdefault(user_id, {})
+        _apply(state, fields)
+        return dict(state)
+
+    async def touch_resume(self, resume_id: str, timestamp: float):
+        self._activity[resume_id] = timestamp
+
+    async def active_resumes(self, since: float) -> List[str]:
+        return [resume_id for resume_id, last_active in self._activity.items() if last_active >= since]
+
+    async def forget_resumes(self, before: float):
+        """Удаление активности и результатов прогрева неактивных резюме"""
+        for resume_id in [key for key, last_active in self._activity.items() if last_active < before]:
+            self._activity.pop(resume_id, None)
+            self._prewarmed.pop(resume_id, None)
+
+    async def put_prewarmed(self, resume_id: str, jobs: List[Dict], expires_at: float):
+        self._prewarmed[resume_id] = (jobs, expires_at)
+
+    async def get_prewarmed(self, resume_id: str) -> Optional[Tuple[List[Dict], float]]:
+        return self._prewarmed.get(resume_id)
+
+    async def close(self):
+        pass
+
+class SqliteStateStore:
+    """Состояние бота в файле SQLite, общее для всех процессов на хосте
+
+    Позволяет запускать несколько webhook-воркеров: обновления одного
+    пользователя могут попасть в разные процессы, но видят одно состояние.
+    Запросы выполняются в отдельном потоке, соединение открывается в
+    каждом процессе при первом обращении (после fork).
+    """
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS user_state (user_id INTEGER PRIMARY KEY, state TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS resume_activity (resume_id TEXT PRIMARY KEY, last_active REAL NOT NULL);
+                CREATE TABLE IF NOT EXISTS prewarmed (
+                    resume_id TEXT PRIMARY KEY, jobs TEXT NOT NULL, expires_at REAL NOT NULL
+                );
+                """
+            )
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _execute(self, func, *args):
+        with self._lock:
+            return func(self._connect(), *args)
+
+    async def _run(self, func, *args):
+        return await asyncio.to_thread(self._execute, func, *args)
+
+    @staticmethod
+    def _load(connection: sqlite3.Connection, user_id: int) -> Dict:
+        row = connection.execute("SELECT state FROM user_state WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    @staticmethod
+    def _store(connection: sqlite3.Connection, user_id: int, state: Dict):
+        connection.execute(
+            "INSERT OR REPLACE INTO user_state (user_id, state) VALUES (?, ?)",
+            (user_id, json.dumps(state, ensure_ascii=False))
+        )
+
+    @classmethod
+    def _update(cls, connection: sqlite3.Connection, user_id: int, fields: Dict) -> Dict:
+        # BEGIN IMMEDIATE берет блокировку записи, чтобы воркеры не теряли изменения друг друга
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            state = cls._load(connection, user_id)
+            _apply(state, fields)
+            cls._store(connection, user_id, state)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return state
+
+    async def get(self, user_id: int) -> Dict:
+        return await self._run(self._load, user_id)
+
+    async def set(self, user_id: int, state: Dict):
+        await self._run(self._store, user_id, state)
+
+    async def update(self, user_id: int, **fields) -> Dict:
+        return await self._run(self._update, user_id, fields)
+
+    async def touch_resume(self, resume_id: str, timestamp: float):
+        await self._run(lambda connection: connection.execute(
+            "INSERT OR REPLACE INTO resume_activity (resume_id, last_active) VALUES (?, ?)", (resume_id, timestamp)
+        ))
+
+    async def active_resumes(self, since: float) -> List[str]:
+        rows = await self._run(lambda connection: connection.execute(
+            "SELECT resume_id FROM resume_activity WHERE last_active >= ?", (since,)
+        ).fetchall())
+        return [row[0] for row in rows]
+
+    async def forget_resumes(self, before: float):
+        def forget(connection: sqlite3.Connection):
+            connection.execute(
+                "DELETE FROM prewarmed WHERE resume_id IN "
+                "(SELECT resume_id FROM resume_activity WHERE last_active < ?)", (before,)
+            )
+            connection.execute("DELETE FROM resume_activity WHERE last_active < ?", (before,))
+        await self._run(forget)
+
+    async def put_prewarmed(self, resume_id: str, jobs: List[Dict], expires_at: float):
+        await self._run(lambda connection: connection.execute(
+            "INSERT OR REPLACE INTO prewarmed (resume_id, jobs, expires_at) VALUES (?, ?, ?)",
+            (resume_id, json.dumps(jobs, ensure_ascii=False), expires_at)
+        ))
+
+    async def get_prewarmed(self, resume_id: str) -> Optional[Tuple[List[Dict], float]]:
+        row = await self._run(lambda connection: connection.execute(
+            "SELECT jobs, expires_at FROM prewarmed WHERE resume_id = ?", (resume_id,)
+        ).fetchone())
+        return (json.loads(row[0]), row[1]) if row else None
+
+    async def close(self):
+        def close(connection: sqlite3.Connection):
+            connection.close()
+            self._connection = None
+        if self._connection is not None and self._pid == os.getpid():
+            await self._run(close)
+
+def _apply(state: Dict, fields: Dict):
+    for name, value in fields.items():
+        if value is None:
+            state.pop(name, None)
+        else:
+            state[name] = value
+
+def create_state_store(url: str = "memory"):
+    """Хранилище по BOT_STATE_STORE: memory или sqlite:<путь к файлу>"""
+    if url == "memory":
+        return MemoryStateStore()
+    if url.startswith("sqlite:"):
+        return SqliteStateStore(url[len("sqlite:"):] or "bot_state.db")
+    raise ValueError(f"Неизвестное хранилище состояния бота: {url}")
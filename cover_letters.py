@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from jinja2 import DictLoader, Environment, StrictUndefined
+
+# Меняется при любой правке шаблонов, чтобы не отдавать письма из старого кэша
+TEMPLATE_VERSION = "1"
+
+TEMPLATES = {
+    "default": """
+Уважаемые коллеги!
+
+Меня заинтересовала вакансия {{ vacancy.title }} в компании {{ vacancy.company }}.
+
+На основе моего опыта и навыков, я уверен, что могу внести значительный вклад в вашу команду.
+{% if experience %}
+{{ experience }}.
+{% endif %}
+{% if relevant_skills %}
+Ключевые навыки, релевантные для этой позиции:
+{% for skill in relevant_skills %}
+• {{ skill }}
+{% endfor %}
+{% elif other_skills %}
+Мои ключевые навыки:
+{% for skill in other_skills[:5] %}
+• {{ skill }}
+{% endfor %}
+{% endif %}
+
+Готов обсудить детали сотрудничества и ответить на все интересующие вопросы.
+
+С уважением,
+{{ name }}
+""",
+    "prompt": """
+Напиши короткое сопроводительное письмо на русском языке.
+Вакансия: {{ vacancy.title }}, компания {{ vacancy.company }}.
+Требования: {{ vacancy.requirements | default("не указаны", true) }}.
+Навыки кандидата, совпадающие с вакансией: {{ relevant_skills | join(", ") or "нет" }}.
+Остальные навыки кандидата: {{ other_skills | join(", ") or "нет" }}.
+{% if experience %}{{ experience }}.{% endif %}
+
+Черновик письма:
+{{ draft }}
+""",
+}
+
+_environment = Environment(
+    loader=DictLoader(TEMPLATES),
+    undefined=StrictUndefined,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False
+)
+
+class LLMBackend(ABC):
+    """Базовый класс LLM-бэкенда для генерации писем"""
+
+    name = "base"
+
+    @abstractmethod
+    async def complete(self, prompt: str, draft: str) -> str:
+        """Письмо по промпту; draft — шаблонный черновик"""
+
+class StubLLMBackend(LLMBackend):
+    """Локальный бэкенд без сети: возвращает черновик из шаблона
+
+    Задержка latency имитирует время ответа модели для замеров.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def complete(self, prompt: str, draft: str) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return draft
+
+LLM_BACKENDS = {
+    StubLLMBackend.name: StubLLMBackend,
+}
+
+def create_llm_backend(name: Optional[str] = None) -> LLMBackend:
+    """Бэкенд по имени из COVER_LETTER_LLM_BACKEND"""
+    name = name or os.getenv("COVER_LETTER_LLM_BACKEND", StubLLMBackend.name)
+    backend_class = LLM_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Неизвестный LLM-бэкенд: {name}")
+    return backend_class()
+
+@lru_cache(maxsize=1024)
+def _skill_pattern(skill: str) -> "re.Pattern":
+    """Поиск навыка целым словом, как в extract_skills_from_text"""
+    return re.compile(r'\b' + re.escape(skill.lower()) + r'\b')
+
+def vacancy_key(vacancy: Dict) -> str:
+    """Ключ вакансии для кэша: id, а без него — хэш содержимого"""
+    if vacancy.get("id") is not None:
+        return f"id:{vacancy['id']}"
+    content = json.dumps(vacancy, sort_keys=True, ensure_ascii=False, default=str)
+    return "sha1:" + hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def resume_hash(resume_text: str, skills: Sequence[str]) -> str:
+    """Хэш содержимого резюме для ключа кэша"""
+    digest = hashlib.sha1(resume_text.encode("utf-8"))
+    digest.update("\x00".join(skills).encode("utf-8"))
+    return digest.hexdigest()
+
+class CoverLetterEngine:
+    """Рендеринг сопроводительных писем по скомпилированным шаблонам Jinja2
+
+    Готовые письма кэшируются по (хэш резюме, id или хэш вакансии, версия шаблона),
+    вызовы LLM ограничены семафором.
+    """
+
+    def __init__(self, backend: Optional[LLMBackend] = None, max_concurrency: int = 4,
+                 cache_size: int = 4096, template_version: str = TEMPLATE_VERSION):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.cache_size = cache_size
+        self.template_version = template_version
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _context(self, skills: Sequence[str], vacancy: Dict) -> Dict:
+        """Переменные шаблона: навыки делятся на релевантные вакансии и остальные"""
+        vacancy_text = f"{vacancy.get('title', '')} {vacancy.get('requirements') or ''}".lower()
+        relevant, other, experience = [], [], None
+        for skill in skills:
+            if skill.startswith("Опыт:"):
+                experience = skill
+            elif _skill_pattern(skill).search(vacancy_text):
+                relevant.append(skill)
+            else:
+                other.append(skill)
+        return {
+            "vacancy": vacancy,
+            "relevant_skills": relevant,
+            "other_skills": other,
+            "experience": experience,
+            "name": "[Ваше имя]"
+        }
+
+    def _cache_get(self, key: tuple) -> Optional[str]:
+        letter = self._cache.get(key)
+        if letter is None:
+            self.misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return letter
+
+    def _cache_put(self, key: tuple, letter: str):
+        self._cache[key] = letter
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _key(self, digest: str, vacancy: Dict, template: str, mode: str) -> tuple:
+        return (digest, vacancy_key(vacancy), f"{template}:{self.template_version}", mode)
+
+    def render(self, resume_text: str, skills: Sequence[str], vacancy: Dict,
+               template: str = "default", digest: Optional[str] = None) -> str:
+        """Шаблонное письмо для одной вакансии"""
+        digest = digest or resume_hash(resume_text, skills)
+        key = self._key(digest, vacancy, template, "template")
+        letter = self._cache_get(key)
+        if letter is None:
+            letter = _environment.get_template(template).render(self._context(skills, vacancy))
+            self._cache_put(key, letter)
+        return letter
+
+    async def _render_with_llm(self, resume_text: str, skills: Sequence[str], vacancy: Dict,
+                               template: str, digest: str) -> str:
+        key = self._key(digest, vacancy, template, self.backend.name)
+        letter = self._cache_get(key)
+        if letter is not None:
+            return letter
+
+        draft = self.render(resume_text, skills, vacancy, template, digest)
+        prompt = _environment.get_template("prompt").render(draft=draft, **self._context(skills, vacancy))
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            letter = await self.backend.complete(prompt, draft)
+
+        self._cache_put(key, letter)
+        return letter
+
+    async def render_batch(self, resume_text: str, skills: Sequence[str], vacancies: List[Dict],
+                           use_llm: bool = False, template: str = "default") -> List[Dict]:
+        """Письма для одного резюме и многих вакансий за один вызов"""
+        digest = resume_hash(resume_text, skills)
+
+        if use_llm and self.backend is not None:
+            letters = await asyncio.gather(*(
+                self._render_with_llm(resume_text, skills, vacancy, template, digest)
+                for vacancy in vacancies
+            ))
+        else:
+            letters = [self.render(resume_text, skills, vacancy, template, digest) for vacancy in vacancies]
+
+        return [
+            {"vacancy_id": vacancy.get("id"), "letter": letter}
+            for vacancy, letter in zip(vacancies, letters)
+        ]
+
+    def stats(self) -> Dict:
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+# Общий движок процесса, чтобы кэш переживал отдельные запросы
+cover_letter_engine = CoverLetterEngine(
+    backend=create_llm_backend(),
+    max_concurrency=int(os.getenv("COVER_LETTER_LLM_CONCURRENCY", "4"))
+)
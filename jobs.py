@@ -1,17 +1,71 @@
 import httpx
 import asyncio
-from typing import List, Dict, Optional
+import time
+from typing import AsyncIterator, List, Dict, Optional
 import os
 from dotenv import load_dotenv
 
+from metrics import registry
+from cover_letters import CoverLetterEngine, cover_letter_engine
+
 load_dotenv()
 
+# Метрики запросов к HeadHunter
+HH_REQUEST_SECONDS = registry.histogram(
+    "resumemate_hh_request_seconds",
+    "Длительность запросов к API HeadHunter",
+    ("endpoint",)
+)
+HH_REQUESTS = registry.counter(
+    "resumemate_hh_requests_total",
+    "Запросы к API HeadHunter",
+    ("endpoint", "status")
+)
+
 class JobSearchService:
     """Сервис для поиска вакансий"""
 
     def __init__(self):
         self.hh_api_token = os.getenv('HH_API_TOKEN')
-        self.base_url = "https://api.hh.ru"
+        self.base_url = os.getenv('HH_API_URL', 'https://api.hh.ru').rstrip('/')
+
+    def _hh_headers(self) -> Dict:
+        """Заголовки запросов к HeadHunter"""
+        headers = {}
+        if self.hh_api_token:
+            headers['Authorization'] = f'Bearer {self.hh_api_token}'
+        return headers
+
+    async def _fetch_vacancies(self, client: httpx.AsyncClient, params: Dict) -> Dict:
+        """Запрос одной страницы /vacancies с записью метрик"""
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await client.get(
+                f"{self.base_url}/vacancies",
+                params=params,
+                headers=self._hh_headers()
+            )
+            status = str(response.status_code)
+        finally:
+            HH_REQUEST_SECONDS.observe(time.perf_counter() - started, "vacancies")
+            HH_REQUESTS.inc("vacancies", status)
+        response.raise_for_status()
+        return response.json()
+
+    def _parse_vacancy(self, item: Dict, skills: List[str]) -> Dict:
+        """Преобразование вакансии HeadHunter с расчетом match score"""
+        return {
+            'id': item['id'],
+            'title': item['name'],
+            'company': item['employer']['name'],
+            'location': item.get('area', {}).get('name', 'Не указан'),
+            'remote': 'удаленно' in item['name'].lower() or 'remote' in item['name'].lower(),
+            'salary': self._format_salary(item.get('salary')),
+            'url': item['alternate_url'],
+            'requirements': item.get('snippet', {}).get('requirement', ''),
+            'match_score': self._calculate_match_score(skills, item)
+        }
 
     async def search_jobs_hh(self, skills: List[str], limit: int = 10) -> List[Dict]:
         """Поиск вакансий на HeadHunter"""
@@ -20,10 +74,6 @@ class JobSearchService:
         # Создаем поисковый запрос из навыков
         search_query = " ".join(skills[:5])  # Берем первые 5 навыков
 
-        headers = {}
-        if self.hh_api_token:
-            headers['Authorization'] = f'Bearer {self.hh_api_token}'
-
         params = {
             'text': search_query,
             'per_page': min(limit, 50),
@@ -32,33 +82,49 @@ class JobSearchService:
 
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/vacancies",
-                    params=params,
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
+                data = await self._fetch_vacancies(client, params)
 
                 for item in data.get('items', []):
-                    job = {
-                        'id': item['id'],
-                        'title': item['name'],
-                        'company': item['employer']['name'],
-                        'location': item.get('area', {}).get('name', 'Не указан'),
-                        'remote': 'удаленно' in item['name'].lower() or 'remote' in item['name'].lower(),
-                        'salary': self._format_salary(item.get('salary')),
-                        'url': item['alternate_url'],
-                        'requirements': item.get('snippet', {}).get('requirement', ''),
-                        'match_score': self._calculate_match_score(skills, item)
-                    }
-                    jobs.append(job)
+                    jobs.append(self._parse_vacancy(item, skills))
 
         except Exception as e:
             print(f"Ошибка при поиске вакансий на HH: {str(e)}")
 
         return jobs
 
+    async def iter_jobs_hh(self, skills: List[str], pages: int = 3, per_page: int = 20) -> AsyncIterator[List[Dict]]:
+        """Поиск вакансий на HeadHunter с выдачей результатов по мере готовности
+
+        Страницы запрашиваются параллельно; каждая страница отдается
+        сразу после получения, вакансии внутри нее отсортированы по match score.
+        """
+        search_query = " ".join(skills[:5])
+
+        async with httpx.AsyncClient() as client:
+            requests = [
+                asyncio.ensure_future(self._fetch_vacancies(client, {
+                    'text': search_query,
+                    'per_page': min(per_page, 50),
+                    'page': page,
+                    'order_by': 'relevance'
+                }))
+                for page in range(pages)
+            ]
+            try:
+                for request in asyncio.as_completed(requests):
+                    try:
+                        data = await request
+                    except Exception as e:
+                        print(f"Ошибка при поиске вакансий на HH: {str(e)}")
+                        continue
+
+                    jobs = [self._parse_vacancy(item, skills) for item in data.get('items', [])]
+                    jobs.sort(key=lambda job: job['match_score'], reverse=True)
+                    yield jobs
+            finally:
+                for request in requests:
+                    request.cancel()
+
     def _format_salary(self, salary_data: Optional[Dict]) -> str:
         """Форматирование зарплаты"""
         if not salary_data:
@@ -141,76 +207,96 @@ class JobSearchService:
         else:
             return await self.get_sample_jobs()
 
+    async def iter_jobs(self, skills: List[str], use_real_api: bool = False, pages: int = 3) -> AsyncIterator[List[Dict]]:
+        """Потоковый поиск вакансий: пачки вакансий по мере получения"""
+        if use_real_api and self.hh_api_token:
+            async for jobs in self.iter_jobs_hh(skills, pages=pages):
+                yield jobs
+        else:
+            yield await self.get_sample_jobs()
+
 class CoverLetterGenerator:
     """Генератор сопроводительных писем"""
 
-    def __init__(self):
+    def __init__(self, engine: CoverLetterEngine = None):
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
+        self.engine = engine or cover_letter_engine
 
-    async def generate_cover_letter(self, resume_text: str, job_data: Dict) -> str:
+    async def generate_cover_letter(self, resume_text: str, job_data: Dict, skills: List[str] = None) -> str:
         """Генерация сопроводительного письма"""
 
         if self.openai_api_key:
-            return await self._generate_with_ai(resume_text, job_data)
+            return await self._generate_with_ai(resume_text, job_data, skills or [])
         else:
-            return self._generate_template(resume_text, job_data)
-
-    def _generate_template(self, resume_text: str, job_data: Dict) -> str:
-        """Генерация шаблонного сопроводительного письма"""
-
-        template = f"""
-Уважаемые коллеги!
-
-Меня заинтересовала вакансия {job_data['title']} в компании {job_data['company']}.
-
-На основе моего опыта и навыков, я уверен, что могу внести значительный вклад в вашу команду.
-Ключевые навыки, релевантные для этой позиции:
-• Навыки из резюме будут добавлены здесь
-
-Готов обсудить детали сотрудничества и ответить на все интересующие вопросы.
+            return self._generate_template(resume_text, job_data, skills or [])
 
-С уважением,
-[Ваше имя]
-        """
+    async def generate_cover_letters(self, resume_text: str, skills: List[str], jobs: List[Dict]) -> List[Dict]:
+        """Сопроводительные письма для нескольких вакансий за один вызов"""
+        return await self.engine.render_batch(resume_text, skills, jobs, use_llm=bool(self.openai_api_key))
 
-        return template
+    def _generate_template(self, resume_text: str, job_data: Dict, skills: List[str] = None) -> str:
+        """Генерация шаблонного сопроводительного письма"""
+        return self.engine.render(resume_text, skills or [], job_data)
 
-    async def _generate_with_ai(self, resume_text: str, job_data: Dict) -> str:
+    async def _generate_with_ai(self, resume_text: str, job_data: Dict, skills: List[str] = None) -> str:
         """Генерация сопроводительного письма с помощью AI"""
-        # Здесь будет интеграция с OpenAI
-        # Пока возвращаем шаблон
-        return self._generate_template(resume_text, job_data)
+        letters = await self.engine.render_batch(resume_text, skills or [], [job_data], use_llm=True)
+        return letters[0]["letter"]
 
 class ResumeAuditService:
     """Сервис аудита резюме"""
 
+    # Ключевые слова, наличие которых проверяет аудит
+    KEYWORDS = ('опыт', 'образование', 'навыки', 'контакты', 'контакт')
+
     def __init__(self):
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
 
     async def audit_resume(self, resume_text: str, skills: List[str]) -> Dict:
         """Аудит резюме и оценка готовности к рынку"""
+        return self.audit_facts([self.section_facts(resume_text)], skills, len(resume_text))
+
+    def section_facts(self, text: str) -> Dict:
+        """Факты о фрагменте резюме, из которых складывается аудит"""
+        text_lower = text.lower()
+        return {
+            'length': len(text),
+            'keywords': [keyword for keyword in self.KEYWORDS if keyword in text_lower]
+        }
+
+    def audit_facts(self, facts: List[Dict], skills: List[str], text_length: int = None) -> Dict:
+        """Аудит по фактам разделов резюме
+
+        Факты неизменившихся разделов берутся из кэша, поэтому повторная
+        проверка новой версии резюме не требует полного текста.
+        """
+        if text_length is None:
+            text_length = sum(fact['length'] for fact in facts)
+        keywords = set()
+        for fact in facts:
+            keywords.update(fact['keywords'])
 
         # Простая эвристика для оценки
-        score = self._calculate_readiness_score(resume_text, skills)
+        score = self._calculate_readiness_score(text_length, keywords, skills)
 
-        recommendations = self._generate_recommendations(resume_text, skills)
+        recommendations = self._generate_recommendations(text_length, keywords, skills)
 
         return {
             'overall_score': score,
             'grade': self._get_grade(score),
             'recommendations': recommendations,
             'skills_count': len(skills),
-            'text_length': len(resume_text)
+            'text_length': text_length
         }
 
-    def _calculate_readiness_score(self, resume_text: str, skills: List[str]) -> int:
+    def _calculate_readiness_score(self, text_length: int, keywords: set, skills: List[str]) -> int:
         """Расчет общей готовности резюме"""
         score = 50  # Базовый score
 
         # Длина резюме
-        if len(resume_text) > 1000:
+        if text_length > 1000:
             score += 15
-        elif len(resume_text) > 500:
+        elif text_length > 500:
             score += 10
 
         # Количество навыков
@@ -221,7 +307,7 @@ class ResumeAuditService:
 
         # Проверка ключевых разделов
         sections = ['опыт', 'образование', 'навыки', 'контакты']
-        found_sections = sum(1 for section in sections if section in resume_text.lower())
+        found_sections = sum(1 for section in sections if section in keywords)
         score += found_sections * 3
 
         return min(score, 100)
@@ -239,23 +325,23 @@ class ResumeAuditService:
         else:
             return 'E'
 
-    def _generate_recommendations(self, resume_text: str, skills: List[str]) -> List[str]:
+    def _generate_recommendations(self, text_length: int, keywords: set, skills: List[str]) -> List[str]:
         """Генерация рекомендаций по улучшению резюме"""
         recommendations = []
 
-        if len(resume_text) < 500:
+        if text_length < 500:
             recommendations.append("📝 Добавьте больше деталей в описание опыта работы")
 
         if len(skills) < 5:
             recommendations.append("🎯 Укажите больше технических навыков")
 
-        if 'опыт' not in resume_text.lower():
+        if 'опыт' not in keywords:
             recommendations.append("💼 Добавьте раздел с опытом работы")
 
-        if 'образование' not in resume_text.lower():
+        if 'образование' not in keywords:
             recommendations.append("🎓 Добавьте информацию об образовании")
 
-        if 'контакт' not in resume_text.lower():
+        if 'контакт' not in keywords:
             recommendations.append("📞 Укажите контактную информацию")
 
         if not recommendations:
@@ -1,33 +1,181 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import JSONResponse
-import PyPDF2
-import docx
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+import asyncio
+import contextvars
 import re
-from typing import List, Dict
+import hmac
+import json
+import logging
+import time
+import uuid
+from typing import List, Dict, Optional
 import os
 from dotenv import load_dotenv
 
+try:
+    import resource
+except ImportError:
+    # Модуля нет на Windows: память воркера не замеряем
+    resource = None
+
+from processing import QueueFull, ResumeJobQueue
+from resume_store import CompactResume
+from metrics import registry
+from profiling import ProfileStore, ProfilingMiddleware, profiling_active, record_worker_profile, run_profiled, worker_profiles
+from admission import ADMISSION_REJECTED, AdmissionClass, AdmissionController, AdmissionMiddleware, client_id
+from jobs import JobSearchService, CoverLetterGenerator, ResumeAuditService
+from matching import MatchingEngine
+from versioning import ResumeVersionStore, merge_skills, section_hash, split_sections
+
 load_dotenv()
 
+# Логгер uvicorn, чтобы сообщения воркеров попадали в его вывод
+logger = logging.getLogger("uvicorn.error")
+
+# Момент импорта модуля; при запуске через run_api.py отсчет идет от старта лаунчера
+STARTED_AT = float(os.getenv("RESUMEMATE_LAUNCH_TS") or time.time())
+startup_seconds = None
+
 app = FastAPI(title="ResumeMate API", description="API для обработки резюме и поиска вакансий")
 
-# Хранилище для загруженных резюме (в продакшене лучше использовать базу данных)
+# Профилирование запросов по заголовку X-Profile: <ADMIN_TOKEN> или по выборке
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+profile_store = ProfileStore(size=int(os.getenv("PROFILING_BUFFER_SIZE", "20")))
+if ADMIN_TOKEN or PROFILING_SAMPLE_RATE > 0:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        sample_rate=PROFILING_SAMPLE_RATE,
+        token=ADMIN_TOKEN
+    )
+
+# Контроль допуска: отдельные лимиты для тяжелых и легких эндпоинтов,
+# квоты на клиента и ограниченные очереди ожидания
+admission = AdmissionController()
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+admission.add_class(
+    AdmissionClass(
+        "heavy",
+        concurrency=int(os.getenv("ADMISSION_HEAVY_CONCURRENCY", "0")) or 2 * (os.cpu_count() or 1),
+        queue_size=int(os.getenv("ADMISSION_HEAVY_QUEUE", "32")),
+        per_client=int(os.getenv("ADMISSION_HEAVY_CLIENT_QUOTA", "4")),
+        queue_timeout=ADMISSION_QUEUE_TIMEOUT
+    ),
+    ("POST", "/upload-resume"),
+    ("POST", "/search-jobs"),
+    ("POST", "/search-jobs/stream"),
+    ("POST", "/cover-letters/batch")
+)
+admission.add_class(
+    AdmissionClass(
+        "light",
+        concurrency=int(os.getenv("ADMISSION_LIGHT_CONCURRENCY", "64")),
+        queue_size=int(os.getenv("ADMISSION_LIGHT_QUEUE", "256")),
+        per_client=int(os.getenv("ADMISSION_LIGHT_CLIENT_QUOTA", "32")),
+        queue_timeout=ADMISSION_QUEUE_TIMEOUT
+    ),
+    ("POST", "/extract-skills"),
+    ("GET", "/health")
+)
+# Токен, с которым доверенные клиенты (бот) передают X-Client-Id
+ADMISSION_CLIENT_TOKEN = os.getenv("ADMISSION_CLIENT_TOKEN", "")
+if os.getenv("ADMISSION_ENABLED", "true").lower() == "true":
+    app.add_middleware(AdmissionMiddleware, controller=admission, client_token=ADMISSION_CLIENT_TOKEN)
+
+# Хранилище для загруженных резюме: resume_id -> CompactResume (в продакшене лучше использовать базу данных)
 resumes_storage = {}
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Извлечение текста из PDF файла"""
+# Вакансии из результатов поиска: id -> данные вакансии
+vacancies_storage = {}
+
+# Векторы навыков резюме и вакансий для подбора top-k
+matching_engine = MatchingEngine()
+
+# Версии резюме по пользователю и файлу, кэш анализа разделов
+resume_versions = ResumeVersionStore(cache_size=int(os.getenv("RESUME_SECTION_CACHE_SIZE", "10000")))
+audit_service = ResumeAuditService()
+
+def _preload_parsers():
+    """Импорт парсеров заранее в процессах пула разбора резюме"""
+    import PyPDF2  # noqa: F401
+    import docx  # noqa: F401
+
+# Очередь фоновой обработки резюме
+job_queue = ResumeJobQueue(initializer=_preload_parsers)
+
+# Метрики обработки резюме
+RESUME_STAGE_SECONDS = registry.histogram(
+    "resumemate_resume_stage_seconds",
+    "Длительность этапов обработки резюме",
+    ("stage", "file_type", "pages")
+)
+RESUME_UPLOADS = registry.counter(
+    "resumemate_resume_uploads_total",
+    "Обработанные загрузки резюме",
+    ("file_type", "status")
+)
+EXTRACT_SKILLS_SECONDS = registry.histogram(
+    "resumemate_extract_skills_seconds",
+    "Длительность запросов /extract-skills"
+)
+EXTRACT_SKILLS_REQUESTS = registry.counter(
+    "resumemate_extract_skills_requests_total",
+    "Запросы /extract-skills",
+    ("status",)
+)
+registry.gauge("resumemate_workers_max", "Размер пула воркеров разбора резюме", lambda: job_queue.max_workers)
+registry.gauge("resumemate_workers_in_flight", "Файлы в обработке пулом воркеров", lambda: job_queue.in_flight)
+registry.gauge("resumemate_jobs_pending", "Фоновые задачи в очереди и в обработке", lambda: job_queue.pending)
+registry.gauge("resumemate_resumes_stored", "Резюме в хранилище", lambda: len(resumes_storage))
+registry.gauge("resumemate_startup_seconds", "Время холодного старта воркера API", lambda: startup_seconds or 0)
+if resource is not None:
+    registry.gauge(
+        "resumemate_process_max_rss_bytes",
+        "Пиковое потребление памяти воркером API",
+        lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    )
+
+def _file_type(filename: str) -> str:
+    """Метка типа файла для метрик"""
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    return extension if extension in ('pdf', 'docx', 'doc') else 'other'
+
+def _pages_label(pages) -> str:
+    """Метка количества страниц: диапазоны, чтобы не плодить серии"""
+    if pages is None:
+        return "unknown"
+    if pages <= 1:
+        return "1"
+    if pages <= 3:
+        return "2-3"
+    if pages <= 10:
+        return "4-10"
+    return "11+"
+
+def _read_pdf(file_path: str):
+    """Извлечение текста и количества страниц из PDF файла"""
+    # Парсеры импортируются лениво: воркерам без загрузок файлов они не нужны
+    import PyPDF2
+
     try:
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
             text = ""
             for page in pdf_reader.pages:
                 text += page.extract_text()
-            return text
+            return text, len(pdf_reader.pages)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Ошибка при обработке PDF: {str(e)}")
 
+def extract_text_from_pdf(file_path: str) -> str:
+    """Извлечение текста из PDF файла"""
+    return _read_pdf(file_path)[0]
+
 def extract_text_from_docx(file_path: str) -> str:
     """Извлечение текста из DOCX файла"""
+    import docx
+
     try:
         doc = docx.Document(file_path)
         text = ""
@@ -107,55 +255,237 @@ def extract_skills_from_text(text: str) -> List[str]:
 
     return unique_skills
 
-@app.post("/upload-resume")
-async def upload_resume(file: UploadFile = File(...)):
-    """Загрузка и обработка резюме"""
-    try:
-        # Создаем директорию для загрузок если её нет
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
+def analyze_section(text: str) -> Dict:
+    """Навыки и факты для аудита одного раздела резюме"""
+    return {"skills": extract_skills_from_text(text), "facts": audit_service.section_facts(text)}
 
-        # Сохраняем файл
-        file_path = os.path.join(upload_dir, file.filename)
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+def parse_resume_file(file_path: str, filename: str, known_sections: frozenset = frozenset()) -> Dict:
+    """Извлечение текста и анализ разделов файла резюме (выполняется в пуле процессов)
 
+    Разделы, хэши которых есть в known_sections, не анализируются:
+    их результаты уже в кэше родительского процесса. Длительности этапов
+    возвращаются вместе с результатом, метрики записывает родительский процесс.
+    """
+    timings = {}
+    pages = None
+    started = time.perf_counter()
+    try:
         # Извлекаем текст в зависимости от типа файла
-        if file.filename.lower().endswith('.pdf'):
-            text = extract_text_from_pdf(file_path)
-        elif file.filename.lower().endswith(('.docx', '.doc')):
+        if filename.lower().endswith('.pdf'):
+            text, pages = _read_pdf(file_path)
+        elif filename.lower().endswith(('.docx', '.doc')):
             text = extract_text_from_docx(file_path)
         else:
             raise HTTPException(status_code=400, detail="Поддерживаются только PDF и DOCX файлы")
+    except HTTPException as e:
+        # HTTPException не переживает передачу между процессами
+        timings["parse"] = time.perf_counter() - started
+        return {"error": e.detail, "status_code": e.status_code, "pages": pages, "timings": timings}
+    timings["parse"] = time.perf_counter() - started
+
+    # Анализируем только изменившиеся разделы
+    started = time.perf_counter()
+    sections = {}
+    analyzed = {}
+    for section, section_text in split_sections(text).items():
+        digest = sections[section] = section_hash(section_text)
+        if digest not in known_sections and digest not in analyzed:
+            analyzed[digest] = analyze_section(section_text)
+    timings["skills"] = time.perf_counter() - started
+
+    return {"text": text, "sections": sections, "analyzed": analyzed, "pages": pages, "timings": timings}
+
+def _record_upload(filename: str, pages, timings: Dict[str, float], status: str):
+    """Запись метрик этапов обработки одного резюме"""
+    file_type = _file_type(filename)
+    pages = _pages_label(pages)
+    for stage, seconds in timings.items():
+        RESUME_STAGE_SECONDS.observe(seconds, stage, file_type, pages)
+    RESUME_UPLOADS.inc(file_type, status)
+
+async def process_resume(file_path: str, filename: str, timings: Dict[str, float] = None,
+                         owner: Optional[str] = None) -> Dict:
+    """Разбор сохраненного файла в пуле воркеров и сохранение результата
+
+    Если у пользователя owner уже есть резюме с таким именем файла, новая
+    загрузка становится его следующей версией: заново анализируются только
+    изменившиеся разделы, в ответе приходит разница навыков.
+    """
+    timings = timings if timings is not None else {}
+    known_sections = resume_versions.known_sections(owner, filename)
+    started = time.perf_counter()
+    try:
+        if profiling_active.get():
+            # Профилируемый запрос разбираем в этом потоке, чтобы PyPDF2 попал в профиль
+            parsed = parse_resume_file(file_path, filename, known_sections)
+        elif worker_profiles.get() is not None:
+            # Запрос из выборки профилируем в процессе пула и добавляем статистику к профилю
+            parsed, stats = await job_queue.run(run_profiled, parse_resume_file, file_path, filename, known_sections)
+            record_worker_profile(stats)
+        else:
+            parsed = await job_queue.run(parse_resume_file, file_path, filename, known_sections)
+    except Exception:
+        _record_upload(filename, None, timings, "error")
+        raise
+    finally:
+        # Удаляем файл после обработки
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    timings.update(parsed["timings"])
+    # Ожидание свободного воркера и передача данных между процессами
+    timings["queue"] = max(0.0, time.perf_counter() - started - sum(parsed["timings"].values()))
+    if "error" in parsed:
+        _record_upload(filename, parsed["pages"], timings, "rejected")
+        raise HTTPException(status_code=parsed["status_code"], detail=parsed["error"])
+
+    text = parsed["text"]
+
+    # Собираем навыки и аудит из результатов разделов
+    started = time.perf_counter()
+    analyses = []
+    for section, digest in parsed["sections"].items():
+        analysis = parsed["analyzed"].get(digest) or resume_versions.get_section(digest)
+        if analysis is None:
+            # Результат вытеснен из кэша, пока файл разбирался
+            analysis = analyze_section(split_sections(text)[section])
+        resume_versions.put_section(digest, analysis)
+        analyses.append(analysis)
+    skills = merge_skills(analysis["skills"] for analysis in analyses)
+    audit = audit_service.audit_facts([analysis["facts"] for analysis in analyses], skills, len(text))
+    timings["audit"] = time.perf_counter() - started
+
+    # Сохраняем в хранилище
+    started = time.perf_counter()
+    # Уникальный id не зависит от размера хранилища и не повторяется после перезапуска
+    resume_id = f"resume_{uuid.uuid4().hex}"
+    resumes_storage[resume_id] = CompactResume(text, skills, filename)
+    matching_engine.upsert_resume(resume_id, skills)
+    version = resume_versions.add_version(owner, filename, resume_id, parsed["sections"], skills)
+    timings["store"] = time.perf_counter() - started
+
+    _record_upload(filename, parsed["pages"], timings, "ok")
+
+    return {
+        "resume_id": resume_id,
+        "skills": skills,
+        "text_length": len(text),
+        "audit": audit,
+        "version": version,
+        "sections_reanalyzed": len(parsed["analyzed"]),
+        "message": "Резюме успешно обработано"
+    }
 
-        # Извлекаем навыки
-        skills = extract_skills_from_text(text)
+def _queue_full_response(rejection: QueueFull) -> JSONResponse:
+    """Быстрый отказ, когда очередь фоновой обработки заполнена"""
+    ADMISSION_REJECTED.inc("heavy", rejection.reason)
+    return JSONResponse(
+        status_code=rejection.status,
+        content={"detail": rejection.reason},
+        headers={"Retry-After": str(rejection.retry_after)}
+    )
 
-        # Сохраняем в хранилище
-        resume_id = f"resume_{len(resumes_storage) + 1}"
-        resumes_storage[resume_id] = {
-            "text": text,
-            "skills": skills,
-            "filename": file.filename
-        }
+@app.post("/upload-resume")
+async def upload_resume(request: Request, file: UploadFile = File(...), async_mode: bool = False,
+                        user_id: Optional[str] = Form(None)):
+    """Загрузка и обработка резюме
+
+    С async_mode=true сразу возвращает job_id, статус доступен на /jobs/{job_id}.
+    Повторная загрузка файла с тем же именем от того же user_id
+    сохраняется как новая версия резюме. Если очередь фоновой обработки
+    заполнена, асинхронная загрузка получает 503 с Retry-After, а если
+    заполнена доля клиента — 429.
+    """
+    # Слот контроля допуска освобождается после ответа 202, поэтому
+    # фоновые задачи ограничены отдельно: всего и на клиента
+    client = client_id(request.scope, ADMISSION_CLIENT_TOKEN)
+    if async_mode:
+        try:
+            job_queue.check(client)
+        except QueueFull as e:
+            return _queue_full_response(e)
 
-        # Удаляем файл после обработки
-        os.remove(file_path)
+    try:
+        # Создаем директорию для загрузок если её нет
+        upload_dir = "uploads"
+        os.makedirs(upload_dir, exist_ok=True)
 
-        return {
-            "resume_id": resume_id,
-            "skills": skills,
-            "text_length": len(text),
-            "message": "Резюме успешно обработано"
-        }
+        # Сохраняем файл под уникальным именем, чтобы параллельные загрузки не пересекались
+        filename = os.path.basename(file.filename)
+        file_path = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{filename}")
+        timings = {}
+
+        started = time.perf_counter()
+        content = await file.read()
+        timings["read"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with open(file_path, "wb") as buffer:
+            buffer.write(content)
+        timings["write"] = time.perf_counter() - started
+
+        if async_mode:
+            try:
+                job_id = job_queue.submit(lambda: process_resume(file_path, filename, timings, user_id), client)
+            except QueueFull as e:
+                os.remove(file_path)
+                return _queue_full_response(e)
+            return JSONResponse(status_code=202, content={
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/jobs/{job_id}",
+                "message": "Резюме поставлено в очередь на обработку"
+            })
+
+        return await process_resume(file_path, filename, timings, user_id)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка при обработке файла: {str(e)}")
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Статус фоновой обработки резюме
+
+    Параметр wait (секунды, до 60) включает long-poll: ответ придет
+    при завершении задачи или по истечении времени ожидания.
+    """
+    if wait > 0:
+        job = await job_queue.wait_for_completion(job_id, min(wait, 60.0))
+    else:
+        job = job_queue.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Поток server-sent events со сменой статусов задачи"""
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+
+    async def event_stream():
+        job = job_queue.get(job_id)
+        while job is not None:
+            yield f"event: status\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+            if job["status"] in ("done", "failed"):
+                break
+
+            previous_status = job["status"]
+            job = await job_queue.wait_for_change(job_id, timeout=15.0)
+            while job is not None and job["status"] == previous_status:
+                # Комментарий-heartbeat держит соединение открытым через прокси
+                yield ": keep-alive\n\n"
+                job = await job_queue.wait_for_change(job_id, timeout=15.0)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.post("/extract-skills")
 async def extract_skills(data: dict):
     """Извлечение навыков из текста резюме"""
+    started = time.perf_counter()
+    status = "ok"
     try:
         text = data.get("text", "")
         if not text:
@@ -169,12 +499,240 @@ async def extract_skills(data: dict):
         }
 
     except Exception as e:
+        status = "error"
         raise HTTPException(status_code=500, detail=f"Ошибка при извлечении навыков: {str(e)}")
+    finally:
+        EXTRACT_SKILLS_SECONDS.observe(time.perf_counter() - started)
+        EXTRACT_SKILLS_REQUESTS.inc(status)
+
+def _resolve_search_skills(data: dict) -> List[str]:
+    """Навыки для поиска: из запроса или из загруженного резюме"""
+    skills = data.get("skills") or []
+    resume_id = data.get("resume_id")
+    if not skills and resume_id:
+        resume = resumes_storage.get(resume_id)
+        if resume is None:
+            raise HTTPException(status_code=404, detail="Резюме не найдено")
+        skills = resume.skills
+
+    if not skills:
+        raise HTTPException(status_code=400, detail="Укажите навыки или resume_id")
+
+    return skills
+
+def extract_skills_batch(texts: List[str]) -> List[List[str]]:
+    """Навыки для пачки текстов"""
+    return [extract_skills_from_text(text) for text in texts]
+
+# Фоновые задачи индексации вакансий и id вакансий, которые они обрабатывают
+_index_tasks = set()
+_indexing_vacancies = set()
+
+def _index_vacancies(jobs: List[Dict]):
+    """Добавление найденных вакансий в индекс подбора в фоне
+
+    Ответ поиска не ждет индексации. Навыки извлекаются в потоке, а не в
+    пуле разбора резюме, чтобы поиск не стоял в очереди за загрузками.
+    """
+    new_jobs = {
+        str(job['id']): job for job in jobs
+        if str(job['id']) not in vacancies_storage and str(job['id']) not in _indexing_vacancies
+    }
+    if not new_jobs:
+        return
+
+    _indexing_vacancies.update(new_jobs)
+    # Индексация переживает запрос и не должна наследовать его контекст
+    task = contextvars.Context().run(asyncio.create_task, _index_vacancy_batch(new_jobs))
+    _index_tasks.add(task)
+    task.add_done_callback(_index_tasks.discard)
+
+async def _index_vacancy_batch(new_jobs: Dict[str, Dict]):
+    try:
+        texts = [f"{job['title']} {job.get('requirements') or ''}" for job in new_jobs.values()]
+        skills_list = await asyncio.to_thread(extract_skills_batch, texts)
+        for (vacancy_id, job), skills in zip(new_jobs.items(), skills_list):
+            vacancies_storage[vacancy_id] = job
+            matching_engine.upsert_vacancy(vacancy_id, skills)
+    except Exception as e:
+        logger.warning(f"Ошибка индексации вакансий: {str(e)}")
+    finally:
+        _indexing_vacancies.difference_update(new_jobs)
+
+@app.post("/search-jobs")
+async def search_jobs(data: dict):
+    """Поиск вакансий по навыкам или по навыкам загруженного резюме"""
+    skills = _resolve_search_skills(data)
+
+    job_service = JobSearchService()
+    jobs = await job_service.search_jobs(skills, use_real_api=data.get("use_real_api", True))
+    _index_vacancies(jobs)
+
+    return {
+        "jobs": jobs,
+        "count": len(jobs)
+    }
+
+@app.post("/search-jobs/stream")
+async def search_jobs_stream(data: dict, accept: str = Header(default="")):
+    """Потоковый поиск вакансий
+
+    Вакансии отправляются по мере получения страниц от HeadHunter:
+    NDJSON по умолчанию или server-sent events при Accept: text/event-stream.
+    Последнее событие summary содержит общее количество вакансий.
+    """
+    skills = _resolve_search_skills(data)
+    try:
+        pages = max(1, min(int(data.get("pages", 3)), 10))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="pages должно быть целым числом")
+    use_sse = "text/event-stream" in accept
+
+    def encode(event_type: str, payload: Dict) -> str:
+        if use_sse:
+            return f"event: {event_type}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        return json.dumps({"type": event_type, **payload}, ensure_ascii=False) + "\n"
+
+    async def event_stream():
+        job_service = JobSearchService()
+        total = 0
+        batches = 0
+        started = time.perf_counter()
+        async for jobs in job_service.iter_jobs(skills, use_real_api=data.get("use_real_api", True), pages=pages):
+            batches += 1
+            for job in jobs:
+                total += 1
+                yield encode("vacancy", {"job": job})
+            _index_vacancies(jobs)
+        yield encode("summary", {
+            "total": total,
+            "batches": batches,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        })
+
+    media_type = "text/event-stream" if use_sse else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type)
+
+@app.get("/match/resume/{resume_id}")
+async def match_vacancies_for_resume(resume_id: str, k: int = 10):
+    """Лучшие k вакансий из найденных ранее для резюме"""
+    matches = matching_engine.top_vacancies(resume_id, max(1, min(k, 100)))
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Резюме не найдено")
+
+    return {
+        "resume_id": resume_id,
+        "matches": [
+            {"score": score, "vacancy": vacancies_storage[vacancy_id]}
+            for vacancy_id, score in matches
+        ]
+    }
+
+@app.get("/match/vacancy/{vacancy_id}")
+async def match_resumes_for_vacancy(vacancy_id: str, k: int = 10):
+    """Лучшие k загруженных резюме для вакансии"""
+    matches = matching_engine.top_resumes(vacancy_id, max(1, min(k, 100)))
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Вакансия не найдена")
+
+    return {
+        "vacancy_id": vacancy_id,
+        "matches": [
+            {
+                "score": score,
+                "resume_id": resume_id,
+                "filename": resumes_storage[resume_id].filename,
+                "skills": resumes_storage[resume_id].skills
+            }
+            for resume_id, score in matches
+        ]
+    }
+
+@app.post("/cover-letters/batch")
+async def cover_letters_batch(data: dict):
+    """Сопроводительные письма для одного резюме и списка вакансий"""
+    resume = resumes_storage.get(data.get("resume_id"))
+    if resume is None:
+        raise HTTPException(status_code=404, detail="Резюме не найдено")
+
+    vacancies = data.get("vacancies") or []
+    if not vacancies or not isinstance(vacancies, list):
+        raise HTTPException(status_code=400, detail="Список вакансий обязателен")
+    for vacancy in vacancies:
+        # Шаблоны писем требуют название вакансии и компанию
+        if not isinstance(vacancy, dict) or not vacancy.get("title") or not vacancy.get("company"):
+            raise HTTPException(status_code=400, detail="У каждой вакансии должны быть title и company")
+
+    generator = CoverLetterGenerator()
+    letters = await generator.generate_cover_letters(resume.text, resume.skills, vacancies)
+
+    return {
+        "letters": letters,
+        "count": len(letters)
+    }
 
 @app.get("/health")
 async def health_check():
     """Проверка работоспособности API"""
-    return {"status": "healthy", "service": "ResumeMate API"}
+    workers = job_queue.stats()
+    workers["saturation"] = round(workers["in_flight"] / workers["max_workers"], 2)
+    return {
+        "status": "healthy",
+        "service": "ResumeMate API",
+        "workers": workers,
+        "admission": admission.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+def _check_admin_token(token: str):
+    """Проверка токена администратора"""
+    if not ADMIN_TOKEN or not hmac.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+
+@app.get("/admin/profiles")
+async def list_profiles(x_admin_token: str = Header(default="")):
+    """Список последних профилей запросов"""
+    _check_admin_token(x_admin_token)
+    return {"profiles": profile_store.list()}
+
+@app.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: int, format: str = "prof", x_admin_token: str = Header(default="")):
+    """Профиль запроса: format=prof для pstats/snakeviz, format=text для сводки"""
+    _check_admin_token(x_admin_token)
+    entry = profile_store.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+
+    if format == "text":
+        return PlainTextResponse(profile_store.summary(entry))
+
+    return Response(
+        content=profile_store.dump(entry),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile_{profile_id}.prof"'}
+    )
+
+@app.on_event("startup")
+async def record_startup():
+    """Замер времени холодного старта и памяти воркера"""
+    global startup_seconds
+    startup_seconds = time.time() - STARTED_AT
+    message = f"Воркер {os.getpid()} запущен за {startup_seconds:.2f} c"
+    if resource is not None:
+        message += f", память {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} МБ"
+    logger.info(message)
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Завершение фоновых задач и остановка пула воркеров"""
+    await job_queue.drain(timeout=float(os.getenv("API_GRACEFUL_TIMEOUT", "30")))
+    if _index_tasks:
+        await asyncio.wait(set(_index_tasks), timeout=5.0)
+    job_queue.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
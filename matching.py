@@ -0,0 +1,245 @@
+import heapq
+import math
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from resume_store import SkillVocabulary
+
+class SparseMatrix:
+    """Разреженная матрица документов с инвертированным индексом по терминам
+
+    Строки хранятся как массивы id терминов и весов, столбцы — как списки
+    (слот строки, вес) в array, что в разы компактнее словарей. Удаленные
+    строки помечаются и вычищаются из индекса, когда их становится много;
+    generation меняется при такой перестройке, потому что меняются слоты.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self.slots: Dict[Hashable, int] = {}
+        self.keys: List[Optional[Hashable]] = []
+        self.rows: List[Optional[Tuple[array, array]]] = []
+        self.postings: Dict[int, Tuple[array, array]] = {}
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def upsert(self, key: Hashable, terms: Dict[int, float]):
+        """Добавить или заменить строку"""
+        if key in self.slots:
+            self.remove(key)
+
+        slot = len(self.rows)
+        indices = array('I', sorted(terms))
+        values = array('f', (terms[term] for term in indices))
+        self.slots[key] = slot
+        self.keys.append(key)
+        self.rows.append((indices, values))
+
+        for term, value in zip(indices, values):
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = (array('I'), array('f'))
+            posting[0].append(slot)
+            posting[1].append(value)
+
+    def remove(self, key: Hashable):
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return
+        self.rows[slot] = None
+        self.keys[slot] = None
+        self.dead += 1
+        if self.dead > 1024 and self.dead > len(self.rows) // 4:
+            self._compact()
+
+    def row(self, key: Hashable) -> Optional[Tuple[array, array]]:
+        slot = self.slots.get(key)
+        return None if slot is None else self.rows[slot]
+
+    def _compact(self):
+        """Перестроение без удаленных строк"""
+        live = [(key, self.rows[slot]) for key, slot in self.slots.items()]
+        generation = self.generation
+        self.__init__()
+        self.generation = generation + 1
+        for key, (indices, values) in live:
+            self.upsert(key, dict(zip(indices, values)))
+
+class MatchingEngine:
+    """Подбор top-k вакансий для резюме и резюме для вакансии
+
+    Резюме и вакансии превращаются в разреженные векторы канонических
+    навыков (как их возвращает extract_skills_from_text) один раз при
+    добавлении. IDF и нормы строк берутся из снимка: нормы новых строк
+    досчитываются по нему при запросе, а целиком снимок пересчитывается,
+    только когда с его построения изменилось больше staleness документов.
+    Скалярные произведения считаются пачкой запросов за один проход по
+    инвертированному индексу, лучшие k выбираются через heapq.
+    """
+
+    def __init__(self, staleness: float = 0.1):
+        self.vocabulary = SkillVocabulary()
+        self.resumes = SparseMatrix()
+        self.vacancies = SparseMatrix()
+        self.document_frequency: Dict[int, int] = {}
+        self.staleness = staleness
+        self._idf_cache: Optional[Dict[int, float]] = None
+        self._idf_total = 0
+        self._pending = 0
+        # id(matrix) -> (generation матрицы, 1/норма по слотам)
+        self._norm_cache: Dict[int, Tuple[int, array]] = {}
+
+    def _terms(self, skills: Iterable[str]) -> Dict[int, float]:
+        """Вектор навыков; строки вида «Опыт: N лет» не являются навыками"""
+        terms = {}
+        for skill in skills:
+            if skill.startswith("Опыт:"):
+                continue
+            terms[self.vocabulary.id_for(skill.lower())] = 1.0
+        return terms
+
+    def _update_frequency(self, matrix: SparseMatrix, key: Hashable, delta: int):
+        row = matrix.row(key)
+        if row is None:
+            return
+        for term in row[0]:
+            self.document_frequency[term] = self.document_frequency.get(term, 0) + delta
+
+    def _drop_norm(self, matrix: SparseMatrix, key: Hashable):
+        """Исключить строку из кэша норм перед ее заменой или удалением"""
+        slot = matrix.slots.get(key)
+        cached = self._norm_cache.get(id(matrix))
+        if slot is not None and cached is not None and cached[0] == matrix.generation and slot < len(cached[1]):
+            cached[1][slot] = 0.0
+
+    def _changed(self):
+        """Учесть изменение документа; снимок IDF пересчитывается пачкой"""
+        self._pending += 1
+        if self._pending > self.staleness * (len(self.resumes) + len(self.vacancies)):
+            self._invalidate()
+
+    def _invalidate(self):
+        self._idf_cache = None
+        self._norm_cache = {}
+        self._pending = 0
+
+    def _upsert(self, matrix: SparseMatrix, key: Hashable, skills: Iterable[str]):
+        self._drop_norm(matrix, key)
+        self._update_frequency(matrix, key, -1)
+        matrix.upsert(key, self._terms(skills))
+        self._update_frequency(matrix, key, 1)
+        self._changed()
+
+    def _remove(self, matrix: SparseMatrix, key: Hashable):
+        if key not in matrix.slots:
+            return
+        self._drop_norm(matrix, key)
+        self._update_frequency(matrix, key, -1)
+        matrix.remove(key)
+        self._changed()
+
+    def upsert_resume(self, resume_id: Hashable, skills: Iterable[str]):
+        self._upsert(self.resumes, resume_id, skills)
+
+    def upsert_vacancy(self, vacancy_id: Hashable, skills: Iterable[str]):
+        self._upsert(self.vacancies, vacancy_id, skills)
+
+    def remove_resume(self, resume_id: Hashable):
+        self._remove(self.resumes, resume_id)
+
+    def remove_vacancy(self, vacancy_id: Hashable):
+        self._remove(self.vacancies, vacancy_id)
+
+    @property
+    def idf(self) -> Dict[int, float]:
+        """Снимок сглаженного IDF по резюме и вакансиям вместе"""
+        if self._idf_cache is None:
+            self._idf_total = len(self.resumes) + len(self.vacancies)
+            self._idf_cache = {
+                term: math.log((1 + self._idf_total) / (1 + frequency)) + 1
+                for term, frequency in self.document_frequency.items()
+            }
+            self._pending = 0
+        return self._idf_cache
+
+    def _term_idf(self, term: int) -> float:
+        """IDF термина; новые термины добавляются в снимок по текущей частоте"""
+        idf = self.idf
+        value = idf.get(term)
+        if value is None:
+            frequency = self.document_frequency.get(term, 0)
+            value = idf[term] = math.log((1 + self._idf_total) / (1 + frequency)) + 1
+        return value
+
+    def _inverse_norms(self, matrix: SparseMatrix) -> array:
+        """1/норма строк по слотам по снимку IDF (0 для удаленных строк)
+
+        Кэш дополняется только нормами строк, добавленных после прошлого
+        запроса, и сбрасывается при перестройке матрицы.
+        """
+        cached = self._norm_cache.get(id(matrix))
+        inverse_norms = cached[1] if cached is not None and cached[0] == matrix.generation else array('d')
+        for slot in range(len(inverse_norms), len(matrix.rows)):
+            row = matrix.rows[slot]
+            norm = 0.0
+            if row is not None:
+                norm = math.sqrt(sum((value * self._term_idf(term)) ** 2 for term, value in zip(*row)))
+            inverse_norms.append(1.0 / norm if norm else 0.0)
+        self._norm_cache[id(matrix)] = (matrix.generation, inverse_norms)
+        return inverse_norms
+
+    def _top_k_batch(self, queries: Dict[Hashable, Tuple[array, array]], target: SparseMatrix,
+                     k: int) -> Dict[Hashable, List[Tuple[Hashable, float]]]:
+        """Косинусная близость пачки запросов ко всем строкам target"""
+        inverse_norms = self._inverse_norms(target)
+
+        # Веса запросов и список запросов для каждого термина
+        query_weights = {}
+        by_term: Dict[int, List[Tuple[Hashable, float]]] = {}
+        for query_key, (indices, values) in queries.items():
+            weights = [(term, value * self._term_idf(term)) for term, value in zip(indices, values)]
+            norm = math.sqrt(sum(weight * weight for _, weight in weights)) or 1.0
+            query_weights[query_key] = {}
+            for term, weight in weights:
+                by_term.setdefault(term, []).append((query_key, weight / norm))
+
+        # Один проход по спискам термина для всех запросов пачки
+        for term, term_queries in by_term.items():
+            posting = target.postings.get(term)
+            if posting is None:
+                continue
+            term_idf = self._term_idf(term)
+            for slot, value in zip(*posting):
+                inverse_norm = inverse_norms[slot]
+                if not inverse_norm:
+                    continue
+                contribution = value * term_idf * inverse_norm
+                for query_key, query_weight in term_queries:
+                    scores = query_weights[query_key]
+                    scores[slot] = scores.get(slot, 0.0) + query_weight * contribution
+
+        return {
+            query_key: [
+                (target.keys[slot], round(score, 4))
+                for slot, score in heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            ]
+            for query_key, scores in query_weights.items()
+        }
+
+    def top_vacancies_batch(self, resume_ids: Sequence[Hashable], k: int = 10) -> Dict[Hashable, List[Tuple[Hashable, float]]]:
+        queries = {key: self.resumes.row(key) for key in resume_ids if self.resumes.row(key) is not None}
+        return self._top_k_batch(queries, self.vacancies, k)
+
+    def top_resumes_batch(self, vacancy_ids: Sequence[Hashable], k: int = 10) -> Dict[Hashable, List[Tuple[Hashable, float]]]:
+        queries = {key: self.vacancies.row(key) for key in vacancy_ids if self.vacancies.row(key) is not None}
+        return self._top_k_batch(queries, self.resumes, k)
+
+    def top_vacancies(self, resume_id: Hashable, k: int = 10) -> Optional[List[Tuple[Hashable, float]]]:
+        """Лучшие k вакансий для резюме или None, если резюме не проиндексировано"""
+        return self.top_vacancies_batch([resume_id], k).get(resume_id)
+
+    def top_resumes(self, vacancy_id: Hashable, k: int = 10) -> Optional[List[Tuple[Hashable, float]]]:
+        """Лучшие k резюме для вакансии или None, если вакансия не проиндексирована"""
+        return self.top_resumes_batch([vacancy_id], k).get(vacancy_id)
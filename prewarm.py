@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PrewarmScheduler:
+    """Фоновое обновление вакансий для недавно активных резюме
+
+    Раз в interval (± jitter) для каждого резюме, активного за последние
+    active_window секунд, заново выполняется поиск вакансий, и /search
+    отдает готовый результат. Одновременно выполняется не больше
+    max_concurrency обновлений. Если задержка запросов пользователей
+    (EWMA) превышает latency_threshold, интервал растет вдвое, вплоть
+    до max_backoff раз, и снова сокращается, когда нагрузка спадает.
+
+    Активность и результаты лежат в store (см. bot_state), поэтому при
+    нескольких webhook-воркерах touch и get работают в каждом из них, а
+    цикл обновления запускается только в одном.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[List[Dict]]], store, interval: float = 300.0,
+                 jitter: float = 0.2, max_concurrency: int = 2, active_window: float = 3600.0,
+                 latency_threshold: float = 2.0, max_backoff: int = 8, tick: float = 5.0,
+                 enabled: bool = True):
+        self.fetch = fetch
+        self.store = store
+        self.enabled = enabled
+        self.interval = interval
+        self.jitter = jitter
+        self.active_window = active_window
+        self.latency_threshold = latency_threshold
+        self.max_backoff = max_backoff
+        self.tick = tick
+
+        self.backoff = 1
+        self.foreground_latency = 0.0
+        self._next_refresh: Dict[str, float] = {}
+        self._refreshing = set()
+        # Ссылки на задачи обновления, чтобы их не собрал сборщик мусора
+        self._refresh_tasks = set()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def touch(self, resume_id: str):
+        """Отметить активность пользователя с этим резюме
+
+        При выключенном прогреве активность не запоминается: обновлять
+        результаты и вычищать устаревшие записи было бы некому.
+        """
+        if not self.enabled:
+            return
+        await self.store.touch_resume(resume_id, time.time())
+
+    async def get(self, resume_id: str) -> Optional[List[Dict]]:
+        """Свежие результаты поиска или None"""
+        if not self.enabled:
+            return None
+        entry = await self.store.get_prewarmed(resume_id)
+        if entry is None:
+            return None
+        jobs, expires_at = entry
+        return jobs if time.time() <= expires_at else None
+
+    def record_foreground_latency(self, seconds: float, alpha: float = 0.2):
+        """Учесть задержку запроса пользователя и пересчитать backoff"""
+        self.foreground_latency = alpha * seconds + (1 - alpha) * self.foreground_latency
+        if self.foreground_latency > self.latency_threshold:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        elif self.backoff > 1 and self.foreground_latency < self.latency_threshold / 2:
+            self.backoff //= 2
+
+    def _delay(self) -> float:
+        """Следующий интервал обновления с учетом backoff и jitter"""
+        base = self.interval * self.backoff
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _refresh(self, resume_id: str):
+        try:
+            async with self._semaphore:
+                started = time.monotonic()
+                jobs = await self.fetch(resume_id)
+                await self.store.put_prewarmed(resume_id, jobs, time.time() + self.interval * self.backoff * 2)
+                logger.debug(f"Прогрев {resume_id}: {len(jobs)} вакансий за {time.monotonic() - started:.2f} c")
+        except Exception as e:
+            logger.warning(f"Ошибка прогрева {resume_id}: {str(e)}")
+        finally:
+            self._next_refresh[resume_id] = time.monotonic() + self._delay()
+            self._refreshing.discard(resume_id)
+
+    async def _sync_active(self):
+        """Запланировать обновление новых активных резюме и забыть неактивные"""
+        since = time.time() - self.active_window
+        await self.store.forget_resumes(since)
+        active = set(await self.store.active_resumes(since))
+
+        now = time.monotonic()
+        for resume_id in active:
+            self._next_refresh.setdefault(resume_id, now)
+        for resume_id in list(self._next_refresh):
+            if resume_id not in active:
+                self._next_refresh.pop(resume_id, None)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._sync_active()
+            except Exception as e:
+                logger.warning(f"Ошибка чтения активности для прогрева: {str(e)}")
+
+            now = time.monotonic()
+            for resume_id, due in list(self._next_refresh.items()):
+                if due <= now and resume_id not in self._refreshing:
+                    self._refreshing.add(resume_id)
+                    task = asyncio.create_task(self._refresh(resume_id))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+
+            await asyncio.sleep(self.tick * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить цикл и прервать начатые обновления"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        tasks = list(self._refresh_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,197 @@
+import asyncio
+import contextvars
+import math
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional
+
+class QueueFull(Exception):
+    """Очередь фоновых задач заполнена целиком (503) или для клиента (429)"""
+
+    def __init__(self, retry_after: int, status: int = 503, reason: str = "job_queue_full"):
+        super().__init__("Очередь обработки резюме заполнена")
+        self.retry_after = retry_after
+        self.status = status
+        self.reason = reason
+
+class ResumeJobQueue:
+    """Фоновая обработка резюме в пуле процессов
+
+    Хранит статусы задач в памяти процесса API. Разбор файлов выполняется
+    в ProcessPoolExecutor, чтобы не блокировать event loop. Незавершенных
+    задач не больше max_pending, из них у одного клиента не больше
+    max_client_pending: сверх этого submit выбрасывает QueueFull.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, ttl: int = 3600, initializer: Optional[Callable] = None,
+                 max_pending: Optional[int] = None, max_client_pending: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv('RESUME_WORKERS', '0')) or os.cpu_count() or 1
+        self.max_pending = max_pending or int(os.getenv('RESUME_QUEUE_SIZE', '100'))
+        self.max_client_pending = max_client_pending or int(os.getenv('RESUME_CLIENT_QUEUE_SIZE', '4'))
+        self.ttl = ttl
+        self.initializer = initializer
+        self.jobs: Dict[str, Dict] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks = set()
+        self._clients: Dict[str, int] = {}
+        self.in_flight = 0
+        # Скользящее среднее длительности задачи для оценки Retry-After
+        self.job_seconds = 1.0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Пул создается при первом использовании"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer)
+        return self._executor
+
+    async def run(self, func: Callable, *args):
+        """Выполнить функцию в пуле процессов"""
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    @property
+    def pending(self) -> int:
+        """Задачи в очереди и в обработке"""
+        return len(self._tasks)
+
+    def full(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def retry_after(self) -> int:
+        """Через сколько секунд в очереди, вероятно, освободится место"""
+        return max(1, math.ceil(self.job_seconds * (self.pending - self.max_pending + 1) / self.max_workers))
+
+    def check(self, client: Optional[str] = None):
+        """Выбросить QueueFull, если новую задачу клиента сейчас не принять"""
+        if self.full():
+            raise QueueFull(self.retry_after())
+        client_pending = self._clients.get(client, 0) if client is not None else 0
+        if client_pending >= self.max_client_pending:
+            # Место освободится, когда завершится самая старая задача клиента
+            retry_after = max(1, math.ceil(self.job_seconds * self.pending / self.max_workers))
+            raise QueueFull(retry_after, status=429, reason="client_job_quota")
+
+    def submit(self, job_factory: Callable[[], Awaitable[Dict]], client: Optional[str] = None) -> str:
+        """Поставить задачу клиента в очередь и сразу вернуть ее id"""
+        self.check(client)
+        self._purge_expired()
+
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "created_at": time.time(),
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        self._changed[job_id] = asyncio.Event()
+
+        # Задача живет дольше запроса и не должна наследовать его контекст
+        # (например, признак профилирования)
+        task = contextvars.Context().run(asyncio.create_task, self._execute(job_id, job_factory))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if client is not None:
+            self._clients[client] = self._clients.get(client, 0) + 1
+            task.add_done_callback(lambda _: self._release_client(client))
+        return job_id
+
+    def _release_client(self, client: str):
+        remaining = self._clients[client] - 1
+        if remaining:
+            self._clients[client] = remaining
+        else:
+            del self._clients[client]
+
+    async def _execute(self, job_id: str, job_factory: Callable[[], Awaitable[Dict]]):
+        self._update(job_id, status="processing")
+        started = time.perf_counter()
+        try:
+            result = await job_factory()
+            self._update(job_id, status="done", result=result, finished_at=time.time())
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            self._update(job_id, status="failed", error=detail, finished_at=time.time())
+        finally:
+            self.job_seconds = 0.2 * (time.perf_counter() - started) + 0.8 * self.job_seconds
+
+    def _update(self, job_id: str, **fields):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+
+        # Будим всех, кто ждет изменения статуса
+        event = self._changed.get(job_id)
+        if event is not None:
+            event.set()
+            self._changed[job_id] = asyncio.Event()
+
+    def _purge_expired(self):
+        """Удаление завершенных задач старше ttl"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] and now - job["finished_at"] > self.ttl
+        ]
+        for job_id in expired:
+            self.jobs.pop(job_id, None)
+            self._changed.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Текущее состояние задачи"""
+        return self.jobs.get(job_id)
+
+    async def wait_for_change(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """Дождаться смены статуса задачи (long-poll)"""
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] in ("done", "failed"):
+            return job
+
+        event = self._changed[job_id]
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.jobs.get(job_id)
+
+    async def wait_for_completion(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """Дождаться завершения задачи или истечения timeout"""
+        deadline = time.monotonic() + timeout
+        job = self.jobs.get(job_id)
+        while job is not None and job["status"] not in ("done", "failed"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            job = await self.wait_for_change(job_id, remaining)
+        return job
+
+    def stats(self) -> Dict:
+        """Загрузка пула воркеров"""
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queued_jobs": self.pending,
+            "max_queued_jobs": self.max_pending,
+            "clients": len(self._clients)
+        }
+
+    async def drain(self, timeout: float):
+        """Дождаться завершения начатых задач при остановке сервера"""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+    def shutdown(self):
+        """Остановка пула процессов"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,154 @@
+import cProfile
+import contextvars
+import hmac
+import io
+import itertools
+import marshal
+import pstats
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# Признак того, что текущий запрос профилируется по заголовку X-Profile:
+# тяжелую работу тогда выполняем в этом же потоке, иначе она не попадет
+# в профиль. Для запросов из случайной выборки признак не ставится,
+# чтобы разбор файла не блокировал event loop
+profiling_active = contextvars.ContextVar("profiling_active", default=False)
+
+# Статистика, снятая в процессах пула для запроса из случайной выборки;
+# None, если запрос не профилируется
+worker_profiles = contextvars.ContextVar("worker_profiles", default=None)
+
+def run_profiled(func, *args):
+    """Выполнение функции под cProfile в процессе пула: (результат, статистика)"""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    profiler.create_stats()
+    return result, profiler.stats
+
+def record_worker_profile(stats: Dict):
+    """Добавить статистику из процесса пула к профилю текущего запроса"""
+    profiles = worker_profiles.get()
+    if profiles is not None:
+        profiles.append(stats)
+
+class _WorkerStats:
+    """Статистика из процесса пула в виде, который принимает pstats.Stats"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+class ProfileStore:
+    """Кольцевой буфер последних профилей запросов"""
+
+    def __init__(self, size: int = 20):
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def add(self, method: str, path: str, status: int, duration: float, stats: pstats.Stats) -> Dict:
+        entry = {
+            "id": next(self._ids),
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "created_at": time.time(),
+            "stats": stats
+        }
+        self._profiles.append(entry)
+        return entry
+
+    def list(self) -> List[Dict]:
+        """Профили без данных статистики, новые первыми"""
+        return [
+            {key: value for key, value in entry.items() if key != "stats"}
+            for entry in reversed(self._profiles)
+        ]
+
+    def get(self, profile_id: int) -> Optional[Dict]:
+        for entry in self._profiles:
+            if entry["id"] == profile_id:
+                return entry
+        return None
+
+    @staticmethod
+    def dump(entry: Dict) -> bytes:
+        """Профиль в формате .prof (pstats, snakeviz)"""
+        return marshal.dumps(entry["stats"].stats)
+
+    @staticmethod
+    def summary(entry: Dict, limit: int = 40, sort: str = "cumulative") -> str:
+        """Текстовая сводка самых тяжелых функций"""
+        buffer = io.StringIO()
+        stats = pstats.Stats(stream=buffer)
+        stats.add(entry["stats"])
+        stats.sort_stats(sort).print_stats(limit)
+        return buffer.getvalue()
+
+class ProfilingMiddleware:
+    """ASGI middleware, снимающее cProfile с выбранных запросов
+
+    Запрос профилируется, если в заголовке X-Profile передан токен
+    или он попал в случайную выборку sample_rate. Тяжелая работа
+    выполняется в потоке запроса только при явном X-Profile; для выборки
+    она профилируется в процессе пула, и статистика добавляется к профилю
+    запроса. Одновременно
+    профилируется не больше одного запроса: cProfile работает на весь
+    поток, и профиль включает другие корутины, выполнявшиеся в это время.
+    """
+
+    def __init__(self, app, store: ProfileStore, sample_rate: float = 0.0, token: str = ""):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.token = token.encode() if token else b""
+        self._busy = False
+
+    def _profile_mode(self, scope) -> Optional[str]:
+        """explicit — по заголовку X-Profile, sampled — по выборке, None — без профиля"""
+        if self._busy:
+            return None
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile" and hmac.compare_digest(value, self.token):
+                    return "explicit"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        mode = self._profile_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self._busy = True
+        context_token = profiling_active.set(mode == "explicit")
+        profiles_token = worker_profiles.set([] if mode == "sampled" else None)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            stats = pstats.Stats(profiler)
+            for profile in worker_profiles.get() or []:
+                stats.add(_WorkerStats(profile))
+            worker_profiles.reset(profiles_token)
+            profiling_active.reset(context_token)
+            self._busy = False
+            self.store.add(scope["method"], scope["path"], status, duration, stats)
@@ -0,0 +1,60 @@
+import zlib
+from array import array
+from typing import Dict, Iterable, List
+
+class SkillVocabulary:
+    """Словарь навыков: каждое название хранится один раз и получает целочисленный id"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def id_for(self, name: str) -> int:
+        """id навыка, новый навык добавляется в словарь"""
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            skill_id = len(self._names)
+            self._ids[name] = skill_id
+            self._names.append(name)
+        return skill_id
+
+    def name(self, skill_id: int) -> str:
+        """Название навыка по id"""
+        return self._names[skill_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+# Общий словарь навыков процесса
+skill_vocabulary = SkillVocabulary()
+
+class CompactResume:
+    """Компактная запись резюме для хранилища в памяти
+
+    Текст хранится сжатым zlib и распаковывается только при обращении
+    к text, навыки хранятся как массив id из общего словаря.
+    """
+
+    __slots__ = ("filename", "text_length", "_text_z", "_skill_ids")
+
+    vocabulary = skill_vocabulary
+
+    def __init__(self, text: str, skills: Iterable[str], filename: str, compress_level: int = 6):
+        self.filename = filename
+        self.text_length = len(text)
+        self._text_z = zlib.compress(text.encode("utf-8"), compress_level)
+
+        skill_ids = [self.vocabulary.id_for(skill) for skill in skills]
+        typecode = 'H' if not skill_ids or max(skill_ids) < 65536 else 'I'
+        self._skill_ids = array(typecode, skill_ids)
+
+    @property
+    def text(self) -> str:
+        """Полный текст резюме (распаковывается при каждом обращении)"""
+        return zlib.decompress(self._text_z).decode("utf-8")
+
+    @property
+    def skills(self) -> List[str]:
+        """Навыки в исходном порядке"""
+        name = self.vocabulary.name
+        return [name(skill_id) for skill_id in self._skill_ids]
@@ -1,26 +1,65 @@
 #!/usr/bin/env python3
 """
 Скрипт для запуска FastAPI сервера
+
+По умолчанию запускается режим разработки с автоперезагрузкой.
+Режим production (API_MODE=production или --prod) работает без
+автоперезагрузки, использует uvloop и httptools, если они установлены,
+и корректно завершает обработку запросов при остановке. Запускается
+один воркер uvicorn: резюме, задачи и метрики хранятся в памяти процесса,
+а разбор файлов и так распределяется по ядрам пулом RESUME_WORKERS.
 """
 
-import uvicorn
+import argparse
+import importlib.util
 import os
+import time
+
+# Время старта лаунчера для замера холодного старта воркеров
+os.environ.setdefault("RESUMEMATE_LAUNCH_TS", str(time.time()))
+
+import uvicorn
 from dotenv import load_dotenv
 
 # Загрузка переменных окружения
 load_dotenv()
 
+def is_installed(module: str) -> bool:
+    """Проверка наличия необязательного модуля без его импорта"""
+    return importlib.util.find_spec(module) is not None
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Запуск ResumeMate API")
+    parser.add_argument("--prod", action="store_true", help="Режим production")
+    args = parser.parse_args()
+
     host = os.getenv("FASTAPI_HOST", "localhost")
     port = int(os.getenv("FASTAPI_PORT", "8000"))
+    production = args.prod or os.getenv("API_MODE", "development").lower() == "production"
 
     print(f"🚀 Запуск FastAPI сервера на {host}:{port}")
-    print("📖 Документация API будет доступна по адресу: http://localhost:8000/docs")
-
-    uvicorn.run(
-        "main:app",
-        host=host,
-        port=port,
-        reload=True,
-        access_log=True
-    )
+    print(f"📖 Документация API будет доступна по адресу: http://{host}:{port}/docs")
+
+    if production:
+        loop = "uvloop" if is_installed("uvloop") else "asyncio"
+        http = "httptools" if is_installed("httptools") else "h11"
+        print(f"🏭 Режим production: loop={loop}, http={http}")
+
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            loop=loop,
+            http=http,
+            access_log=os.getenv("API_ACCESS_LOG", "false").lower() == "true",
+            timeout_graceful_shutdown=int(os.getenv("API_GRACEFUL_TIMEOUT", "30")),
+            proxy_headers=True
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            reload=True,
+            access_log=True
+        )
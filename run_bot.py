@@ -4,8 +4,41 @@
 """
 
 import asyncio
+import multiprocessing
+import os
 import sys
-from bot import main
+from dotenv import load_dotenv
+
+# Загрузка переменных окружения
+load_dotenv()
+
+mode = os.getenv("BOT_MODE", "polling").lower()
+workers = max(1, int(os.getenv("BOT_WEBHOOK_WORKERS", "1"))) if mode == "webhook" else 1
+
+# Несколько воркеров должны видеть одно состояние пользователей: по умолчанию
+# оно хранится в SQLite-файле рядом с ботом
+if workers > 1:
+    os.environ.setdefault("BOT_STATE_STORE", "sqlite:bot_state.db")
+
+from bot import main, run_webhook
+
+def start_webhook_workers(workers: int):
+    """Запуск нескольких webhook-воркеров на одном порту"""
+    processes = []
+    for worker_index in range(workers):
+        process = multiprocessing.Process(target=run_webhook, args=(worker_index,), name=f"bot-webhook-{worker_index}")
+        process.start()
+        processes.append(process)
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        raise
 
 if __name__ == "__main__":
     print("🤖 Запуск Telegram бота ResumeMate...")
@@ -15,7 +48,18 @@ if __name__ == "__main__":
     print("   • Все зависимости установлены")
 
     try:
-        asyncio.run(main())
+        if mode == "webhook":
+            if workers > 1 and os.environ["BOT_STATE_STORE"] == "memory":
+                print("❌ BOT_STATE_STORE=memory нельзя использовать с BOT_WEBHOOK_WORKERS > 1: "
+                      "воркеры не увидят состояние друг друга")
+                sys.exit(1)
+            print(f"🌐 Режим webhook, воркеров: {workers}")
+            if workers == 1:
+                run_webhook(0)
+            else:
+                start_webhook_workers(workers)
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\n👋 Бот остановлен пользователем")
         sys.exit(0)
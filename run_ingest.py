@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Скрипт пакетной загрузки резюме из директории или zip-архива
+
+Файлы разбираются в пуле процессов теми же функциями, что и в API.
+Результаты пишутся в JSONL или в SQLite пачками; уже обработанные
+файлы при повторном запуске пропускаются, поэтому прерванную загрузку
+можно просто перезапустить.
+
+Пример:
+    python run_ingest.py resumes.zip --output resumes.jsonl --workers 8
+    python run_ingest.py ./resumes --sqlite resumes.db
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import zipfile
+from typing import Dict, Iterator, List, Set
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.doc')
+STAGES = ("read", "extract_text", "extract_skills")
+
+# Открытый архив кэшируется в каждом воркере
+_zip_cache = {}
+
+def iter_source(source: str) -> Iterator[str]:
+    """Ключи файлов резюме: относительный путь в директории или имя в архиве"""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in archive.namelist():
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield name
+    else:
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield os.path.relpath(os.path.join(root, name), source)
+
+def process_file(task) -> Dict:
+    """Разбор одного файла в воркере"""
+    from fastapi import HTTPException
+    from main import extract_text_from_pdf, extract_text_from_docx, extract_skills_from_text
+
+    source, key = task
+    timings = {}
+    filename = os.path.basename(key)
+    temp_path = None
+
+    try:
+        started = time.perf_counter()
+        if zipfile.is_zipfile(source):
+            archive = _zip_cache.get(source)
+            if archive is None:
+                archive = _zip_cache[source] = zipfile.ZipFile(source)
+            suffix = os.path.splitext(filename)[1]
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+                temp_file.write(archive.read(key))
+                temp_path = temp_file.name
+            file_path = temp_path
+        else:
+            file_path = os.path.join(source, key)
+        timings["read"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if filename.lower().endswith('.pdf'):
+            text = extract_text_from_pdf(file_path)
+        else:
+            text = extract_text_from_docx(file_path)
+        timings["extract_text"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        skills = extract_skills_from_text(text)
+        timings["extract_skills"] = time.perf_counter() - started
+
+        return {"key": key, "filename": filename, "text": text, "skills": skills, "timings": timings}
+
+    except HTTPException as e:
+        return {"key": key, "filename": filename, "error": e.detail, "timings": timings}
+    except Exception as e:
+        return {"key": key, "filename": filename, "error": str(e), "timings": timings}
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class JsonlSink:
+    """Запись результатов в JSONL; сам файл служит чекпоинтом"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._repair_tail()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _repair_tail(self):
+        """Обрезка недописанной последней строки после аварийного завершения"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Ищем последний перевод строки с конца файла
+            position = size
+            while position > 0:
+                step = min(65536, position)
+                position -= step
+                f.seek(position)
+                chunk = f.read(step)
+                index = chunk.rfind(b"\n")
+                if index != -1:
+                    f.truncate(position + index + 1)
+                    return
+            f.truncate(0)
+
+    def done_keys(self) -> Set[str]:
+        keys = set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                keys.add(json.loads(line)["key"])
+        return keys
+
+    def write_batch(self, records: List[Dict]):
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+class SqliteSink:
+    """Запись результатов в SQLite-хранилище резюме, одна транзакция на пачку"""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS resumes (
+                source_key TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                text TEXT,
+                skills TEXT,
+                text_length INTEGER,
+                error TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def done_keys(self) -> Set[str]:
+        return {row[0] for row in self.conn.execute("SELECT source_key FROM resumes")}
+
+    def write_batch(self, records: List[Dict]):
+        rows = [
+            (
+                record["key"],
+                record["filename"],
+                record.get("text"),
+                json.dumps(record.get("skills", []), ensure_ascii=False),
+                len(record.get("text") or ""),
+                record.get("error")
+            )
+            for record in records
+        ]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO resumes VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        self.conn.close()
+
+def print_report(processed: int, failed: int, skipped: int, elapsed: float, stage_totals: Dict[str, float]):
+    """Итоговая статистика загрузки"""
+    print(f"\n📊 Обработано: {processed}, с ошибками: {failed}, пропущено (уже были): {skipped}")
+    if elapsed > 0:
+        print(f"⚡ Скорость: {processed / elapsed:.1f} docs/sec за {elapsed:.1f} c")
+    print("⏱ Время по этапам (суммарно по воркерам / в среднем на документ):")
+    for stage, total in stage_totals.items():
+        average = total / processed * 1000 if processed else 0
+        print(f"   {stage:<15} {total:>9.2f} c  {average:>8.2f} мс")
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная загрузка резюме из директории или zip-архива")
+    parser.add_argument("source", help="Директория или zip-архив с PDF/DOCX резюме")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="Файл JSONL для результатов")
+    target.add_argument("--sqlite", help="База SQLite для результатов")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Количество процессов")
+    parser.add_argument("--batch-size", type=int, default=500, help="Записей в одной транзакции")
+    parser.add_argument("--chunksize", type=int, default=16, help="Файлов на одну отправку в воркер")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ Источник не найден: {args.source}")
+        sys.exit(1)
+
+    sink = JsonlSink(args.output) if args.output else SqliteSink(args.sqlite)
+    done = sink.done_keys()
+    if done:
+        print(f"↩️ Продолжаем с чекпоинта: уже обработано {len(done)} файлов")
+
+    skipped = 0
+
+    def pending_tasks():
+        nonlocal skipped
+        for key in iter_source(args.source):
+            if key in done:
+                skipped += 1
+                continue
+            yield (args.source, key)
+
+    stage_totals = {stage: 0.0 for stage in STAGES + ("write",)}
+    processed = failed = 0
+    batch = []
+    started = time.perf_counter()
+
+    def flush():
+        write_started = time.perf_counter()
+        sink.write_batch(batch)
+        stage_totals["write"] += time.perf_counter() - write_started
+        batch.clear()
+
+    print(f"🚀 Загрузка резюме из {args.source}, воркеров: {args.workers}")
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            for record in pool.imap_unordered(process_file, pending_tasks(), chunksize=args.chunksize):
+                for stage, value in record.pop("timings").items():
+                    stage_totals[stage] += value
+                processed += 1
+                if "error" in record:
+                    failed += 1
+                batch.append(record)
+
+                if len(batch) >= args.batch_size:
+                    flush()
+                    elapsed = time.perf_counter() - started
+                    print(f"   {processed} файлов, {processed / elapsed:.1f} docs/sec")
+        if batch:
+            flush()
+    except KeyboardInterrupt:
+        if batch:
+            flush()
+        print("\n⏸ Остановлено, прогресс сохранен")
+    finally:
+        sink.close()
+
+    print_report(processed, failed, skipped, time.perf_counter() - started, stage_totals)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Заголовки разделов резюме; текст до первого заголовка попадает в summary
+SECTION_HEADERS = {
+    "experience": ("опыт работы", "опыт", "трудовой опыт", "work experience", "experience"),
+    "education": ("образование", "education"),
+    "skills": ("ключевые навыки", "навыки", "технические навыки", "skills"),
+    "contacts": ("контакты", "контактная информация", "contacts"),
+}
+
+_EXPERIENCE_PREFIX = "Опыт: "
+
+def _section_for_line(line: str) -> Optional[str]:
+    """Название раздела, если строка похожа на его заголовок"""
+    header = line.strip().lower().rstrip(":").strip()
+    if not header or len(header.split()) > 4:
+        return None
+    for section, keywords in SECTION_HEADERS.items():
+        for keyword in keywords:
+            if header == keyword or header.startswith(keyword + " "):
+                return section
+    return None
+
+def split_sections(text: str) -> Dict[str, str]:
+    """Разбиение текста резюме на разделы по заголовкам
+
+    Повторяющиеся разделы склеиваются, строка заголовка остается в
+    тексте раздела.
+    """
+    lines: Dict[str, List[str]] = {}
+    current = "summary"
+    for line in text.splitlines():
+        current = _section_for_line(line) or current
+        lines.setdefault(current, []).append(line)
+    return {section: "\n".join(section_lines) for section, section_lines in lines.items()}
+
+def section_hash(section_text: str) -> str:
+    """Хэш точного текста раздела
+
+    Пробелы и переносы строк не нормализуются: извлечение навыков от них
+    зависит ("Power BI" и "Power\nBI"), и разделы, отличающиеся только
+    ими, должны анализироваться заново.
+    """
+    return hashlib.sha1(section_text.encode("utf-8")).hexdigest()
+
+def merge_skills(skill_lists: Iterable[List[str]]) -> List[str]:
+    """Объединение навыков разделов, опыт из разных разделов сводится в одну запись"""
+    skills = set()
+    years = set()
+    for section_skills in skill_lists:
+        for skill in section_skills:
+            if skill.startswith(_EXPERIENCE_PREFIX):
+                years.update(re.findall(r"\d+", skill))
+            else:
+                skills.add(skill)
+
+    if years:
+        skills.add(f"{_EXPERIENCE_PREFIX}{', '.join(sorted(years, key=int))} лет")
+
+    merged = list(skills)
+    merged.sort(key=lambda x: len(x), reverse=True)
+    return merged
+
+class ResumeVersionStore:
+    """Версии резюме по пользователю и имени файла и кэш анализа разделов
+
+    Результат анализа раздела (навыки и факты для аудита) кэшируется по
+    хэшу его текста, поэтому при повторной загрузке заново анализируются
+    только изменившиеся разделы.
+    """
+
+    def __init__(self, cache_size: int = 10000, history_size: int = 10):
+        self.cache_size = cache_size
+        self.history_size = history_size
+        self._sections: "OrderedDict[str, Dict]" = OrderedDict()
+        self._versions: Dict[Tuple[str, str], List[Dict]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_section(self, digest: str) -> Optional[Dict]:
+        analysis = self._sections.get(digest)
+        if analysis is None:
+            self.misses += 1
+            return None
+        self._sections.move_to_end(digest)
+        self.hits += 1
+        return analysis
+
+    def put_section(self, digest: str, analysis: Dict):
+        self._sections[digest] = analysis
+        self._sections.move_to_end(digest)
+        while len(self._sections) > self.cache_size:
+            self._sections.popitem(last=False)
+
+    def known_sections(self, owner: Optional[str], filename: str) -> frozenset:
+        """Хэши разделов последней версии, результаты которых еще в кэше"""
+        latest = self.latest(owner, filename)
+        if latest is None:
+            return frozenset()
+        return frozenset(digest for digest in latest["sections"].values() if digest in self._sections)
+
+    def latest(self, owner: Optional[str], filename: str) -> Optional[Dict]:
+        if owner is None:
+            return None
+        versions = self._versions.get((owner, filename))
+        return versions[-1] if versions else None
+
+    def add_version(self, owner: Optional[str], filename: str, resume_id: str,
+                    sections: Dict[str, str], skills: List[str]) -> Dict:
+        """Сохранение новой версии и разница с предыдущей"""
+        previous = self.latest(owner, filename)
+        version = {
+            "resume_id": resume_id,
+            "version": previous["version"] + 1 if previous else 1,
+            "sections": sections,
+            "skills": skills,
+            "created_at": time.time()
+        }
+        if owner is not None:
+            versions = self._versions.setdefault((owner, filename), [])
+            versions.append(version)
+            del versions[:-self.history_size]
+
+        return {
+            "version": version["version"],
+            "previous_resume_id": previous["resume_id"] if previous else None,
+            **self.diff(previous, version)
+        }
+
+    @staticmethod
+    def diff(previous: Optional[Dict], current: Dict) -> Dict:
+        """Изменившиеся разделы и приобретенные/утраченные навыки"""
+        if previous is None:
+            return {
+                "changed_sections": sorted(current["sections"]),
+                "unchanged_sections": [],
+                "skills_added": [],
+                "skills_removed": []
+            }
+
+        before, after = previous["sections"], current["sections"]
+        changed = sorted(
+            section for section in set(before) | set(after) if before.get(section) != after.get(section)
+        )
+        old_skills, new_skills = set(previous["skills"]), set(current["skills"])
+        return {
+            "changed_sections": changed,
+            "unchanged_sections": sorted(set(after) - set(changed)),
+            "skills_added": sorted(new_skills - old_skills),
+            "skills_removed": sorted(old_skills - new_skills)
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "cached_sections": len(self._sections),
+            "hits": self.hits,
+            "misses": self.misses,
+            "resumes": len(self._versions)
+        }